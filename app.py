@@ -1,7 +1,7 @@
 import streamlit as st
 import pandas as pd
 import os
-from lottery_analyzer import LotteryAnalyzer
+from lottery_analyzer import LotteryAnalyzer, validate_draws, quarantine_draws, format_validation_report
 import plotly.express as px
 import plotly.graph_objects as go
 
@@ -11,24 +11,35 @@ st.set_page_config(
     layout="wide"
 )
 
-@st.cache_data
-def load_analyzer():
+@st.cache_resource
+def load_shared_analyzer():
+    # プロセス内で1度だけ読み込み、全セッションで読み取り専用として共有する
     analyzer = LotteryAnalyzer()
-    # デフォルトでサンプルデータを読み込み
-    try:
-        analyzer.load_data('loto6', 'data/loto6_large_sample.csv')
-        analyzer.load_data('loto7', 'data/loto7_large_sample.csv')
-        analyzer.load_data('numbers3', 'data/numbers3_large_sample.csv')
-        analyzer.load_data('numbers4', 'data/numbers4_large_sample.csv')
-    except FileNotFoundError:
-        pass  # ファイルがない場合はスキップ
-    return analyzer
+    # デフォルトでサンプルデータを並列に読み込み（ファイルがないものはスキップ）
+    _, errors = analyzer.load_many({
+        'loto6': 'data/loto6_large_sample.csv',
+        'loto7': 'data/loto7_large_sample.csv',
+        'numbers3': 'data/numbers3_large_sample.csv',
+        'numbers4': 'data/numbers4_large_sample.csv',
+    })
+    return analyzer, errors
 
-analyzer = load_analyzer()
+def load_session_analyzer():
+    # アップロードしたデータはセッションごとのオーバーレイにだけ反映する（他のユーザーには見えない）
+    shared_analyzer, errors = load_shared_analyzer()
+    if st.session_state.get('analyzer_base') is not shared_analyzer:
+        st.session_state.analyzer = shared_analyzer.overlay()
+        st.session_state.analyzer_base = shared_analyzer
+    return st.session_state.analyzer, errors
+
+analyzer, load_errors = load_session_analyzer()
 
 st.title("🎰 宝くじ予想AI")
 st.markdown("過去データを分析して次回の当選番号を予想します")
 
+for lottery_type, message in load_errors.items():
+    st.warning(f"{lottery_type} のサンプルデータを読み込めませんでした: {message}")
+
 # 初回アクセス用の説明を追加
 if 'loto6' in analyzer.data:
     st.info("💡 **クイックスタート**: 各タブの「🎲 サンプルデータを使用」ボタンでデモをお試しください！")
@@ -66,10 +77,15 @@ def upload_and_process_csv(lottery_type, expected_columns):
                 st.error(f"必要な列が見つかりません: {missing_columns}")
                 return False
             
-            csv_path = f"data/{lottery_type}.csv"
-            df.to_csv(csv_path, index=False, encoding='utf-8')
+            report = validate_draws(lottery_type, df)
+            if len(report['invalid_rows']):
+                st.error(f"不正なデータが{len(report['invalid_rows'])}行あります")
+                st.text(format_validation_report(report))
+                if not st.checkbox("不正な行を除外して読み込む", key=f"{lottery_type}_quarantine"):
+                    return False
+                df, _ = quarantine_draws(df, report)
             
-            count = analyzer.load_data(lottery_type, csv_path)
+            count = analyzer.load_frame(lottery_type, df)
             st.success(f"{lottery_type}データを読み込みました ({count}回分)")
             
             st.dataframe(df.head(), use_container_width=True)
@@ -81,19 +97,118 @@ def upload_and_process_csv(lottery_type, expected_columns):
     
     return False
 
-def show_frequency_chart(lottery_type, numbers_prefix, max_number):
+def run_prediction(lottery_type, model, recent_count, half_life, box_weighting=False):
+    if model == "遷移(マルコフ)":
+        return getattr(analyzer, f"predict_{lottery_type}_transition")()
+    if model == "機械学習":
+        return getattr(analyzer, f"predict_{lottery_type}_ml")()
+    if lottery_type.startswith('numbers'):
+        return getattr(analyzer, f"predict_{lottery_type}")(recent_count, box_weighting=box_weighting, half_life=half_life)
+    return getattr(analyzer, f"predict_{lottery_type}")(recent_count, half_life=half_life)
+
+def show_significance(lottery_type, prediction, recent_count):
+    # 予想した数字の偏りが偶然の範囲かどうか（多重比較補正済みの検定結果）
+    summary = analyzer.significance_summary(lottery_type, prediction, recent_count)
+    if summary:
+        st.markdown("### 📊 統計的有意性")
+        st.text(summary)
+        st.caption("補正後p < 0.05 のものを有意としています（Benjamini-Hochberg 法）")
+
+def frequency_mode_controls(lottery_type):
+    mode = st.radio("集計方法", ["直近N回", "時間減衰"], horizontal=True, key=f"{lottery_type}_mode")
+    if mode == "時間減衰":
+        return st.slider("半減期（回）", 5, 100, 20, key=f"{lottery_type}_half_life")
+    return None
+
+def show_frequency_chart(lottery_type, numbers_prefix, max_number, recent_count=30):
     if lottery_type in analyzer.data:
-        frequency = analyzer.analyze_frequency(lottery_type, numbers_prefix, max_number)
+        # 全スライダー値の集計は事前計算済み（スライダー変更時は参照のみ）
+        curves = analyzer.get_frequency_curves(lottery_type, numbers_prefix, max_number)
+        # 抽選数がスライダー値より少ない場合は全件の集計を表示
+        count = min(recent_count, len(curves))
+        if count == 0:
+            return
         
         fig = px.bar(
-            x=list(frequency.keys()),
-            y=list(frequency.values()),
-            title=f"{lottery_type} 数字別出現頻度 (過去30回)",
+            x=list(range(1, max_number + 1)),
+            y=curves[count - 1].tolist(),
+            title=f"{lottery_type} 数字別出現頻度 (過去{count}回)",
             labels={'x': '数字', 'y': '出現回数'}
         )
         
         st.plotly_chart(fig, use_container_width=True)
 
+def show_frequency_heatmap(lottery_type, numbers_prefix, max_number, recent_count=30):
+    rolling = analyzer.analyze_rolling_frequency(lottery_type, numbers_prefix, max_number, recent_count)
+    if rolling is None:
+        return
+
+    fig = go.Figure(go.Heatmap(
+        z=rolling['counts'],
+        x=rolling['dates'],
+        y=rolling['numbers'],
+        colorscale='Viridis',
+        colorbar={'title': '出現回数'}
+    ))
+    fig.update_layout(
+        title=f"{lottery_type} 数字別出現回数の推移 (直近{recent_count}回ごと)",
+        xaxis_title="抽選日",
+        yaxis_title="数字"
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+def show_draw_search(lottery_type, max_number):
+    if lottery_type not in analyzer.data:
+        return
+
+    with st.expander("🔍 過去の抽選を検索"):
+        numbers = st.multiselect("数字を選択", list(range(1, max_number + 1)), key=f"{lottery_type}_search_numbers")
+        if not numbers:
+            return
+
+        min_matches = 1
+        if len(numbers) > 1:
+            min_matches = st.slider("一致数（以上）", 1, len(numbers), len(numbers), key=f"{lottery_type}_search_min")
+        draw_ids = analyzer.find_draws(lottery_type, numbers, min_matches)
+        st.markdown(f"該当回数: **{len(draw_ids)}回**")
+        if len(draw_ids) > 0:
+            st.dataframe(analyzer.data[lottery_type].iloc[draw_ids[::-1][:50]], use_container_width=True)
+
+def show_number_lookup(lottery_type, digits):
+    query = st.text_input(f"番号を検索（{digits}桁）", max_chars=digits, key=f"{lottery_type}_lookup")
+    if not query:
+        return
+    if not query.isdigit():
+        st.error("数字を入力してください")
+        return
+
+    history = analyzer.lookup_number(lottery_type, query)
+    if history is None:
+        return
+
+    def last_date(key):
+        value = history[key]
+        return str(value)[:10] if value is not None else "なし"
+
+    number = query.zfill(digits)
+    st.markdown(f"**{number}** ストレート: {history['straight_count']}回 (最終: {last_date('straight_last_date')})")
+    st.markdown(f"**{number}** ボックス: {history['box_count']}回 (最終: {last_date('box_last_date')})")
+
+def show_wheel_generator(lottery_type, recent_count=30, half_life=None):
+    with st.expander("🎡 ホイール買い目生成"):
+        pool_size = st.slider("候補数字の数（出現頻度の上位）", 8, 20, 12, key=f"{lottery_type}_wheel_pool")
+        cover = st.radio("保証する組", [2, 3], format_func=lambda k: "ペア" if k == 2 else "トリプル",
+                         horizontal=True, key=f"{lottery_type}_wheel_cover")
+        if st.button("買い目を生成", key=f"{lottery_type}_wheel_run"):
+            with st.spinner("探索中..."):
+                pool, tickets = analyzer.generate_wheel(lottery_type, pool_size, cover, recent_count, half_life,
+                                                        time_budget=3.0)
+            if pool is None:
+                return
+            st.markdown(f"候補数字: {', '.join(str(n) for n in pool)}")
+            st.markdown(f"買い目: **{len(tickets)}口**")
+            st.dataframe(pd.DataFrame(tickets, index=range(1, len(tickets) + 1)), use_container_width=True)
+
 def main():
     tab1, tab2, tab3, tab4 = st.tabs(["ロト6", "ロト7", "ナンバーズ3", "ナンバーズ4"])
     
@@ -109,10 +224,12 @@ def main():
             with col1:
                 st.subheader("📊 分析結果")
                 recent_count = st.slider("分析対象回数", 10, 100, 30, key="loto6_recent")
+                model = st.radio("予想モデル", ["出現頻度", "遷移(マルコフ)", "機械学習"], horizontal=True, key="loto6_model")
+                half_life = frequency_mode_controls('loto6')
                 
                 if st.button("予想実行", key="loto6_predict"):
                     with st.spinner("分析中..."):
-                        result, explanation = analyzer.predict_loto6(recent_count)
+                        result, explanation = run_prediction('loto6', model, recent_count, half_life)
                         
                         if result:
                             prediction, bonus = result
@@ -125,12 +242,16 @@ def main():
                             
                             st.markdown("### 📝 予想根拠")
                             st.text(explanation)
+                            show_significance('loto6', prediction, recent_count)
                         else:
                             st.error(explanation)
             
             with col2:
                 st.subheader("📈 出現頻度グラフ")
-                show_frequency_chart('loto6', 'loto6_', 43)
+                show_frequency_chart('loto6', 'loto6_', 43, recent_count)
+                show_frequency_heatmap('loto6', 'loto6_', 43, recent_count)
+                show_draw_search('loto6', 43)
+                show_wheel_generator('loto6', recent_count, half_life)
     
     with tab2:
         st.header("🎯 ロト7予想")
@@ -144,10 +265,12 @@ def main():
             with col1:
                 st.subheader("📊 分析結果")
                 recent_count = st.slider("分析対象回数", 10, 100, 30, key="loto7_recent")
+                model = st.radio("予想モデル", ["出現頻度", "遷移(マルコフ)", "機械学習"], horizontal=True, key="loto7_model")
+                half_life = frequency_mode_controls('loto7')
                 
                 if st.button("予想実行", key="loto7_predict"):
                     with st.spinner("分析中..."):
-                        result, explanation = analyzer.predict_loto7(recent_count)
+                        result, explanation = run_prediction('loto7', model, recent_count, half_life)
                         
                         if result:
                             prediction, bonus_list = result
@@ -161,12 +284,16 @@ def main():
                             
                             st.markdown("### 📝 予想根拠")
                             st.text(explanation)
+                            show_significance('loto7', prediction, recent_count)
                         else:
                             st.error(explanation)
             
             with col2:
                 st.subheader("📈 出現頻度グラフ")
-                show_frequency_chart('loto7', 'loto7_', 37)
+                show_frequency_chart('loto7', 'loto7_', 37, recent_count)
+                show_frequency_heatmap('loto7', 'loto7_', 37, recent_count)
+                show_draw_search('loto7', 37)
+                show_wheel_generator('loto7', recent_count, half_life)
     
     with tab3:
         st.header("🎯 ナンバーズ3予想")
@@ -180,10 +307,13 @@ def main():
             with col1:
                 st.subheader("📊 分析結果")
                 recent_count = st.slider("分析対象回数", 10, 100, 30, key="numbers3_recent")
+                model = st.radio("予想モデル", ["出現頻度", "遷移(マルコフ)", "機械学習"], horizontal=True, key="numbers3_model")
+                half_life = frequency_mode_controls('numbers3')
+                box_weighting = st.checkbox("ボックス出現傾向を考慮", key="numbers3_box")
                 
                 if st.button("予想実行", key="numbers3_predict"):
                     with st.spinner("分析中..."):
-                        prediction, explanation = analyzer.predict_numbers3(recent_count)
+                        prediction, explanation = run_prediction('numbers3', model, recent_count, half_life, box_weighting)
                         
                         if prediction:
                             st.success("✨ 予想完了!")
@@ -193,6 +323,7 @@ def main():
                             
                             st.markdown("### 📝 予想根拠")
                             st.text(explanation)
+                            show_significance('numbers3', prediction, recent_count)
                         else:
                             st.error(explanation)
             
@@ -202,6 +333,7 @@ def main():
                     data_info = analyzer.data['numbers3']
                     st.metric("総データ数", len(data_info))
                     st.metric("最新抽選日", str(data_info['date'].max())[:10])
+                    show_number_lookup('numbers3', 3)
     
     with tab4:
         st.header("🎯 ナンバーズ4予想")
@@ -215,10 +347,13 @@ def main():
             with col1:
                 st.subheader("📊 分析結果")
                 recent_count = st.slider("分析対象回数", 10, 100, 30, key="numbers4_recent")
+                model = st.radio("予想モデル", ["出現頻度", "遷移(マルコフ)", "機械学習"], horizontal=True, key="numbers4_model")
+                half_life = frequency_mode_controls('numbers4')
+                box_weighting = st.checkbox("ボックス出現傾向を考慮", key="numbers4_box")
                 
                 if st.button("予想実行", key="numbers4_predict"):
                     with st.spinner("分析中..."):
-                        prediction, explanation = analyzer.predict_numbers4(recent_count)
+                        prediction, explanation = run_prediction('numbers4', model, recent_count, half_life, box_weighting)
                         
                         if prediction:
                             st.success("✨ 予想完了!")
@@ -228,6 +363,7 @@ def main():
                             
                             st.markdown("### 📝 予想根拠")
                             st.text(explanation)
+                            show_significance('numbers4', prediction, recent_count)
                         else:
                             st.error(explanation)
             
@@ -237,6 +373,7 @@ def main():
                     data_info = analyzer.data['numbers4']
                     st.metric("総データ数", len(data_info))
                     st.metric("最新抽選日", str(data_info['date'].max())[:10])
+                    show_number_lookup('numbers4', 4)
 
     st.sidebar.markdown("---")
     st.sidebar.markdown("### 🎯 クイックスタート")
@@ -4,11 +4,14 @@
 実際のデータパターンに近い統計的な分布を持つサンプルを作成
 """
 
+import argparse
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import random
 
+from lottery_analyzer import write_draws
+
 def generate_loto6_data(num_draws=500):
     """ロト6のサンプルデータを生成（より現実的な分布）"""
     data = []
@@ -155,36 +158,53 @@ def create_weighted_prob(start, end, range_type):
     
     return weights / weights.sum()
 
+def save_dataframe(df, path, file_format='csv'):
+    """CSV または Parquet/Arrow 形式で保存（形式は拡張子で判定）"""
+    if file_format != 'csv':
+        # 列指向フォーマットでは日付を日付型で保存（日付範囲での行グループ絞り込み用）
+        df = df.copy()
+        df['date'] = pd.to_datetime(df['date'])
+    write_draws(df, path)
+
+def output_path(name, file_format):
+    extensions = {'csv': 'csv', 'parquet': 'parquet', 'arrow': 'arrow'}
+    return f"data/{name}_large_sample.{extensions[file_format]}"
+
 def main():
+    parser = argparse.ArgumentParser(description="大量サンプルデータ生成")
+    parser.add_argument('--format', choices=['csv', 'parquet', 'arrow'], default='csv',
+                        help="出力フォーマット (Parquet/Arrow は pyarrow が必要)")
+    args = parser.parse_args()
+
     print("📊 大量サンプルデータ生成中...")
     
     # ロト6データ生成（500回分）
     print("🎯 ロト6データ生成中...")
     loto6_df = generate_loto6_data(500)
-    loto6_df.to_csv('data/loto6_large_sample.csv', index=False, encoding='utf-8')
+    save_dataframe(loto6_df, output_path('loto6', args.format), args.format)
     print(f"✅ ロト6: {len(loto6_df)}回分のデータを生成")
     
     # ロト7データ生成（400回分）
     print("🎯 ロト7データ生成中...")
     loto7_df = generate_loto7_data(400)
-    loto7_df.to_csv('data/loto7_large_sample.csv', index=False, encoding='utf-8')
+    save_dataframe(loto7_df, output_path('loto7', args.format), args.format)
     print(f"✅ ロト7: {len(loto7_df)}回分のデータを生成")
     
     # ナンバーズ3データ生成（600回分）
     print("🎯 ナンバーズ3データ生成中...")
     numbers3_df = generate_numbers_data(3, 600)
-    numbers3_df.to_csv('data/numbers3_large_sample.csv', index=False, encoding='utf-8')
+    save_dataframe(numbers3_df, output_path('numbers3', args.format), args.format)
     print(f"✅ ナンバーズ3: {len(numbers3_df)}回分のデータを生成")
     
     # ナンバーズ4データ生成（600回分）
     print("🎯 ナンバーズ4データ生成中...")
     numbers4_df = generate_numbers_data(4, 600)
-    numbers4_df.to_csv('data/numbers4_large_sample.csv', index=False, encoding='utf-8')
+    save_dataframe(numbers4_df, output_path('numbers4', args.format), args.format)
     print(f"✅ ナンバーズ4: {len(numbers4_df)}回分のデータを生成")
     
     print("🎉 全てのサンプルデータ生成完了！")
     print("\n📝 使用方法:")
-    print("1. 各CSVファイルをStreamlitアプリにアップロード")
+    print("1. 各データファイルをStreamlitアプリにアップロード")
     print("2. 分析対象回数を50-100回に設定")
     print("3. 予想実行で統計的により意味のある予測を確認")
 
@@ -4,6 +4,7 @@
 実際のデータパターンに近い統計的な分布を持つサンプルを作成
 """
 
+import argparse
 import csv
 from datetime import datetime, timedelta
 import random
@@ -138,46 +139,83 @@ def save_csv(filename, headers, data):
         writer.writerow(headers)
         writer.writerows(data)
 
+def save_parquet(filename, headers, data, file_format='parquet'):
+    """Parquet/Arrow ファイルを保存（pyarrow が必要）"""
+    import pyarrow as pa
+
+    columns = list(zip(*data)) if data else [[] for _ in headers]
+    arrays = []
+    for header, values in zip(headers, columns):
+        if header == 'date':
+            values = [datetime.strptime(v, '%Y-%m-%d').date() for v in values]
+            arrays.append(pa.array(values, type=pa.date32()))
+        elif header == 'day':
+            arrays.append(pa.array(values, type=pa.string()))
+        else:
+            arrays.append(pa.array(values, type=pa.int64()))
+    table = pa.Table.from_arrays(arrays, names=headers)
+
+    if file_format == 'parquet':
+        import pyarrow.parquet as pq
+        pq.write_table(table, filename, row_group_size=50000)
+    else:
+        import pyarrow.feather as feather
+        feather.write_feather(table, filename)
+
+def save_data(name, headers, data, file_format):
+    """指定フォーマットで保存し、保存先パスを返す"""
+    filename = f"data/{name}_large_sample.{file_format}"
+    if file_format == 'csv':
+        save_csv(filename, headers, data)
+    else:
+        save_parquet(filename, headers, data, file_format)
+    return filename
+
 def main():
+    parser = argparse.ArgumentParser(description="大量サンプルデータ生成（pandas不要版）")
+    parser.add_argument('--format', choices=['csv', 'parquet', 'arrow'], default='csv',
+                        help="出力フォーマット (Parquet/Arrow は pyarrow が必要)")
+    args = parser.parse_args()
+
     print("📊 大量サンプルデータ生成中...")
     
     # ロト6データ生成（500回分）
     print("🎯 ロト6データ生成中...")
     loto6_data = generate_loto6_data(500)
     loto6_headers = ['date', 'day', 'loto6_1', 'loto6_2', 'loto6_3', 'loto6_4', 'loto6_5', 'loto6_6', 'bonus']
-    save_csv('data/loto6_large_sample.csv', loto6_headers, loto6_data)
+    save_data('loto6', loto6_headers, loto6_data, args.format)
     print(f"✅ ロト6: {len(loto6_data)}回分のデータを生成")
     
     # ロト7データ生成（400回分）
     print("🎯 ロト7データ生成中...")
     loto7_data = generate_loto7_data(400)
     loto7_headers = ['date', 'day', 'loto7_1', 'loto7_2', 'loto7_3', 'loto7_4', 'loto7_5', 'loto7_6', 'loto7_7', 'bonus1', 'bonus2']
-    save_csv('data/loto7_large_sample.csv', loto7_headers, loto7_data)
+    save_data('loto7', loto7_headers, loto7_data, args.format)
     print(f"✅ ロト7: {len(loto7_data)}回分のデータを生成")
     
     # ナンバーズ3データ生成（600回分）
     print("🎯 ナンバーズ3データ生成中...")
     numbers3_data = generate_numbers_data(3, 600)
     numbers_headers = ['date', 'day', 'number']
-    save_csv('data/numbers3_large_sample.csv', numbers_headers, numbers3_data)
+    save_data('numbers3', numbers_headers, numbers3_data, args.format)
     print(f"✅ ナンバーズ3: {len(numbers3_data)}回分のデータを生成")
     
     # ナンバーズ4データ生成（600回分）
     print("🎯 ナンバーズ4データ生成中...")
     numbers4_data = generate_numbers_data(4, 600)
-    save_csv('data/numbers4_large_sample.csv', numbers_headers, numbers4_data)
+    save_data('numbers4', numbers_headers, numbers4_data, args.format)
     print(f"✅ ナンバーズ4: {len(numbers4_data)}回分のデータを生成")
     
     print("🎉 全てのサンプルデータ生成完了！")
     print("\n📝 使用方法:")
-    print("1. 各 *_large_sample.csv ファイルをStreamlitアプリにアップロード")
+    print(f"1. 各 *_large_sample.{args.format} ファイルをStreamlitアプリにアップロード")
     print("2. 分析対象回数を50-100回に設定")
     print("3. 予想実行で統計的により意味のある予測を確認")
     print("\n📊 生成されたファイル:")
-    print("- data/loto6_large_sample.csv (500回分)")
-    print("- data/loto7_large_sample.csv (400回分)")
-    print("- data/numbers3_large_sample.csv (600回分)")
-    print("- data/numbers4_large_sample.csv (600回分)")
+    print(f"- data/loto6_large_sample.{args.format} (500回分)")
+    print(f"- data/loto7_large_sample.{args.format} (400回分)")
+    print(f"- data/numbers3_large_sample.{args.format} (600回分)")
+    print(f"- data/numbers4_large_sample.{args.format} (600回分)")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
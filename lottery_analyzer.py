@@ -1,28 +1,807 @@
+import os
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import numpy as np
+import lottery_wheel
+from lottery_core import LOTO_GAMES, NUMBERS_GAMES, WEEKDAYS
 from datetime import datetime, timedelta
 from collections import Counter
 import random
 
+# 列指向フォーマット（pyarrow.dataset のフォーマット名）
+COLUMNAR_FORMATS = {
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.arrow': 'ipc',
+    '.feather': 'ipc',
+}
+
+PARQUET_ROW_GROUP_SIZE = 50000
+
+TICKET_CHUNK_SIZE = 1024
+
+
+def detect_file_format(path):
+    ext = os.path.splitext(str(path))[1].lower()
+    return COLUMNAR_FORMATS.get(ext, 'csv')
+
+
+def _date_scalar(value, arrow_type):
+    import pyarrow as pa
+
+    timestamp = pd.Timestamp(value)
+    if pa.types.is_date(arrow_type):
+        return pa.scalar(timestamp.date(), type=arrow_type)
+    if pa.types.is_timestamp(arrow_type):
+        return pa.scalar(timestamp.to_pydatetime(), type=arrow_type)
+    return pa.scalar(timestamp.strftime('%Y-%m-%d'))
+
+
+def read_columnar(path, columns=None, start_date=None, end_date=None, recent_count=None):
+    # pyarrow は Parquet/Arrow を扱う場合のみ必要
+    import pyarrow.dataset as ds
+
+    file_format = detect_file_format(path)
+    dataset = ds.dataset(str(path), format=file_format)
+
+    # 日付範囲は行グループの統計情報で絞り込まれる
+    date_filter = None
+    if start_date is not None or end_date is not None:
+        date_type = dataset.schema.field('date').type
+        if start_date is not None:
+            date_filter = ds.field('date') >= _date_scalar(start_date, date_type)
+        if end_date is not None:
+            upper = ds.field('date') <= _date_scalar(end_date, date_type)
+            date_filter = upper if date_filter is None else date_filter & upper
+
+    if recent_count is None:
+        return dataset.to_table(columns=columns, filter=date_filter).to_pandas()
+
+    if file_format == 'parquet':
+        # 末尾の行グループから必要な件数だけ読み込む
+        row_groups = []
+        for fragment in dataset.get_fragments():
+            row_groups.extend(fragment.split_by_row_group(date_filter))
+
+        tables = []
+        remaining = recent_count
+        for row_group in reversed(row_groups):
+            if remaining <= 0:
+                break
+            table = row_group.to_table(columns=columns, filter=date_filter)
+            tables.append(table)
+            remaining -= table.num_rows
+
+        if tables:
+            import pyarrow as pa
+            table = pa.concat_tables(list(reversed(tables)))
+        else:
+            table = dataset.schema.empty_table()
+            if columns is not None:
+                table = table.select(columns)
+    else:
+        table = dataset.to_table(columns=columns, filter=date_filter)
+
+    return table.slice(max(0, table.num_rows - recent_count)).to_pandas()
+
+
+def read_draws(csv_path, columns=None, start_date=None, end_date=None, recent_count=None, date_errors='raise'):
+    # date_errors='coerce' では解釈できない日付を NaT にする（検査して取り除く場合）
+    if detect_file_format(csv_path) != 'csv':
+        df = read_columnar(csv_path, columns, start_date, end_date, recent_count)
+        if 'date' in df.columns:
+            df['date'] = pd.to_datetime(df['date'], errors=date_errors)
+        return df
+
+    # 日付で絞り込む場合は、指定された列になくても date 列を読み込む
+    filter_dates = start_date is not None or end_date is not None
+    usecols = columns
+    if columns is not None and filter_dates and 'date' not in columns:
+        usecols = list(columns) + ['date']
+    df = pd.read_csv(csv_path, encoding='utf-8', usecols=usecols)
+    if 'date' in df.columns:
+        df['date'] = pd.to_datetime(df['date'], errors=date_errors)
+        if start_date is not None:
+            df = df[df['date'] >= pd.Timestamp(start_date)]
+        if end_date is not None:
+            df = df[df['date'] <= pd.Timestamp(end_date)]
+    if columns is not None:
+        df = df[columns]
+    if recent_count is not None:
+        df = df.tail(recent_count)
+    return df.reset_index(drop=True)
+
+
+def _downcast(values, dtype):
+    # 欠損や範囲外の値がある列は変換しない
+    limits = np.iinfo(dtype)
+    if values.isna().any() or not pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+        return values
+    if not pd.api.types.is_integer_dtype(values) and not (values == np.floor(values)).all():
+        # 欠損があった行を取り除いた後の float 列も、整数値だけなら変換する
+        return values
+    if len(values) and (values.min() < limits.min or values.max() > limits.max):
+        return values
+    return values.astype(dtype)
+
+
+def compact_draws(lottery_type, df):
+    # 曜日はカテゴリ型、ロトの数字は uint8、ナンバーズの番号は uint16 で保持
+    df = df.copy()
+    if 'day' in df.columns and not isinstance(df['day'].dtype, pd.CategoricalDtype):
+        extra = sorted(set(df['day'].dropna().unique()) - set(WEEKDAYS))
+        df['day'] = pd.Categorical(df['day'], categories=WEEKDAYS + extra)
+
+    if lottery_type in LOTO_GAMES:
+        game = LOTO_GAMES[lottery_type]
+        for col in df.columns:
+            if col.startswith(game['prefix']) or col in game['bonus_columns']:
+                df[col] = _downcast(df[col], np.uint8)
+    elif lottery_type in NUMBERS_GAMES and 'number' in df.columns:
+        df['number'] = _downcast(df['number'], np.uint16)
+    return df
+
+
+VALIDATION_MESSAGES = {
+    'invalid_date': "日付が不正",
+    'day_mismatch': "曜日が日付と一致しない",
+    'ball_range': "数字が範囲外または欠損",
+    'duplicate_numbers': "本数字が重複",
+    'bonus_overlap': "ボーナス数字が本数字と重複",
+    'number_range': "番号が桁数を超える、または整数でない",
+}
+
+
+def _numeric_matrix(df, columns):
+    # 数値でない値は NaN として扱う
+    return np.column_stack([pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float) for col in columns])
+
+
+def validate_draws(lottery_type, df):
+    # 全行をまとめて検査し、検査項目ごとの不正な行位置を返す
+    errors = {}
+
+    if 'date' in df.columns:
+        dates = pd.to_datetime(df['date'], errors='coerce')
+        invalid_date = dates.isna().to_numpy()
+        errors['invalid_date'] = invalid_date
+        if 'day' in df.columns:
+            expected_day = np.array(WEEKDAYS, dtype=object)[dates.dt.dayofweek.fillna(0).to_numpy(dtype=np.int64)]
+            errors['day_mismatch'] = ~invalid_date & (df['day'].astype(object).to_numpy() != expected_day)
+
+    if lottery_type in LOTO_GAMES:
+        game = LOTO_GAMES[lottery_type]
+        main_columns = [f"{game['prefix']}{i}" for i in range(1, game['picks'] + 1)]
+        main = _numeric_matrix(df, main_columns)
+        bonus = _numeric_matrix(df, game['bonus_columns'])
+        balls = np.hstack([main, bonus])
+
+        in_range = (balls >= 1) & (balls <= game['number_range']) & (balls == np.floor(balls))
+        errors['ball_range'] = ~in_range.all(axis=1)
+        errors['duplicate_numbers'] = (np.diff(np.sort(main, axis=1), axis=1) == 0).any(axis=1)
+        overlap = (main[:, :, np.newaxis] == bonus[:, np.newaxis, :]).any(axis=(1, 2))
+        if bonus.shape[1] > 1:
+            overlap |= (np.diff(np.sort(bonus, axis=1), axis=1) == 0).any(axis=1)
+        errors['bonus_overlap'] = overlap
+    elif lottery_type in NUMBERS_GAMES:
+        values = _numeric_matrix(df, ['number'])[:, 0]
+        limit = 10 ** NUMBERS_GAMES[lottery_type]['digits']
+        errors['number_range'] = ~((values >= 0) & (values < limit) & (values == np.floor(values)))
+
+    invalid = np.zeros(len(df), dtype=bool)
+    for mask in errors.values():
+        invalid |= mask
+    return {
+        'rows': len(df),
+        'errors': {check: np.flatnonzero(mask) for check, mask in errors.items()},
+        'invalid_rows': np.flatnonzero(invalid),
+    }
+
+
+def quarantine_draws(df, report):
+    # 不正な行を取り除いた DataFrame と、取り除いた行を返す
+    invalid = np.zeros(len(df), dtype=bool)
+    invalid[report['invalid_rows']] = True
+    return df[~invalid].reset_index(drop=True), df[invalid]
+
+
+def format_validation_report(report, max_rows=10):
+    lines = []
+    for check, rows in report['errors'].items():
+        if len(rows):
+            shown = ", ".join(str(row + 1) for row in rows[:max_rows])
+            more = f" 他{len(rows) - max_rows}行" if len(rows) > max_rows else ""
+            lines.append(f"{VALIDATION_MESSAGES[check]}: {len(rows)}行 (行 {shown}{more})")
+    return "\n".join(lines)
+
+
+def write_draws(df, path, row_group_size=PARQUET_ROW_GROUP_SIZE):
+    file_format = detect_file_format(path)
+    if file_format == 'parquet':
+        df.to_parquet(path, index=False, row_group_size=row_group_size)
+    elif file_format == 'ipc':
+        df.reset_index(drop=True).to_feather(path)
+    else:
+        df.to_csv(path, index=False, encoding='utf-8')
+
+
+def encode_bitmasks(numbers):
+    # 数字 n をビット n に対応させ、1行を1つの uint64 にまとめる
+    numbers = np.asarray(numbers, dtype=np.uint64)
+    if numbers.ndim == 1:
+        numbers = numbers[:, np.newaxis]
+    if numbers.shape[1] == 0:
+        return np.zeros(numbers.shape[0], dtype=np.uint64)
+    return np.bitwise_or.reduce(np.left_shift(np.uint64(1), numbers), axis=1)
+
+
+_POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def popcount(masks):
+    masks = np.ascontiguousarray(masks, dtype=np.uint64)
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(masks).astype(np.uint8)
+    counts = _POPCOUNT_TABLE[masks.view(np.uint8)].reshape(masks.shape + (8,))
+    return counts.sum(axis=-1, dtype=np.uint8)
+
+
+def _prize_table(lottery_type):
+    # [本数字の一致数, ボーナス一致の有無] -> 等級 (0 は当選なし)
+    if lottery_type == 'loto6':
+        table = np.zeros((7, 2), dtype=np.int8)
+        table[6, :] = 1
+        table[5, :] = [3, 2]
+        table[4, :] = 4
+        table[3, :] = 5
+    else:
+        table = np.zeros((8, 2), dtype=np.int8)
+        table[7, :] = 1
+        table[6, :] = [3, 2]
+        table[5, :] = 4
+        table[4, :] = 5
+        table[3, :] = [0, 6]
+    return table
+
+
+PRIZE_TABLES = {lottery_type: _prize_table(lottery_type) for lottery_type in LOTO_GAMES}
+
+
+def _match_keys(matches, bonus_hit):
+    # (一致数, ボーナス一致) を PRIZE_TABLES をフラットにした位置に変換
+    return (matches.astype(np.uint8) << 1) | bonus_hit.astype(np.uint8)
+
+
+def prize_tiers(lottery_type, matches, bonus_matches):
+    return np.take(PRIZE_TABLES[lottery_type].ravel(), _match_keys(matches, bonus_matches > 0))
+
+
+class NumberIndex:
+    # 数字 -> その数字を含む抽選回 (行位置) の昇順配列
+    def __init__(self, number_range):
+        self.number_range = number_range
+        self.size = 0
+        self.postings = {i: np.empty(0, dtype=np.int32) for i in range(1, number_range + 1)}
+
+    def extend(self, numbers):
+        numbers = np.asarray(numbers, dtype=np.int64)
+        if numbers.ndim == 1:
+            numbers = numbers[:, np.newaxis]
+        draw_ids = np.arange(self.size, self.size + len(numbers), dtype=np.int32)
+        self.size += len(numbers)
+        if numbers.size == 0:
+            return
+
+        flat_numbers = numbers.ravel()
+        flat_ids = np.repeat(draw_ids, numbers.shape[1])
+        # 安定ソートで各数字内の抽選回の昇順を保つ（uint8 では基数ソートになる）
+        order = np.argsort(flat_numbers.astype(np.uint8), kind='stable')
+        counts = np.bincount(flat_numbers, minlength=self.number_range + 1)
+        groups = np.split(flat_ids[order], np.cumsum(counts)[:-1])
+        for number in range(1, self.number_range + 1):
+            if counts[number]:
+                self.postings[number] = np.concatenate([self.postings[number], groups[number]])
+
+    def draws_with_all(self, numbers):
+        postings = sorted((self.postings[n] for n in set(numbers)), key=len)
+        if not postings:
+            return np.arange(self.size, dtype=np.int32)
+        result = postings[0]
+        for other in postings[1:]:
+            if len(result) == 0:
+                break
+            result = np.intersect1d(result, other, assume_unique=True)
+        return result
+
+    def draws_with_at_least(self, numbers, min_matches):
+        numbers = set(numbers)
+        if min_matches > len(numbers):
+            return np.empty(0, dtype=np.int32)
+        if min_matches == len(numbers):
+            return self.draws_with_all(numbers)
+        if min_matches <= 0:
+            return np.arange(self.size, dtype=np.int32)
+        hits = np.concatenate([self.postings[n] for n in numbers])
+        draw_ids, counts = np.unique(hits, return_counts=True)
+        return draw_ids[counts >= min_matches].astype(np.int32)
+
+
+class NumbersIndex:
+    # ストレート (当選番号そのもの) とボックス (並び替えた数字) ごとの出現回数と最終出現回
+    def __init__(self, digits):
+        self.digits = digits
+        space = 10 ** digits
+        place_values = 10 ** np.arange(digits - 1, -1, -1)
+
+        self.digit_table = (np.arange(space)[:, np.newaxis] // place_values) % 10
+        self.box_keys = (np.sort(self.digit_table, axis=1) * place_values).sum(axis=1)
+        self.box_sizes = np.bincount(self.box_keys, minlength=space)[self.box_keys]
+
+        self.size = 0
+        self.straight_counts = np.zeros(space, dtype=np.int64)
+        self.straight_last = np.full(space, -1, dtype=np.int64)
+        self.box_counts = np.zeros(space, dtype=np.int64)
+        self.box_last = np.full(space, -1, dtype=np.int64)
+
+    def extend(self, numbers):
+        numbers = np.asarray(numbers, dtype=np.int64)
+        draw_ids = np.arange(self.size, self.size + len(numbers), dtype=np.int64)
+        self.size += len(numbers)
+        if len(numbers) == 0:
+            return
+
+        space = len(self.straight_counts)
+        boxes = self.box_keys[numbers]
+        self.straight_counts += np.bincount(numbers, minlength=space)
+        self.box_counts += np.bincount(boxes, minlength=space)
+        np.maximum.at(self.straight_last, numbers, draw_ids)
+        np.maximum.at(self.box_last, boxes, draw_ids)
+
+    def lookup(self, number):
+        box = self.box_keys[number]
+        return {
+            'straight_count': int(self.straight_counts[number]),
+            'straight_last': int(self.straight_last[number]),
+            'box_count': int(self.box_counts[box]),
+            'box_last': int(self.box_last[box]),
+            'box_size': int(self.box_sizes[number]),
+        }
+
+
+class DecayedFrequency:
+    # 半減期 half_life 回の指数減衰頻度。1回の更新は O(number_range)
+    def __init__(self, size, half_life, positions=None):
+        self.size = size
+        self.half_life = half_life
+        self.decay = 0.5 ** (1.0 / half_life)
+        self.positions = positions
+        self.values = np.zeros(size if positions is None else (positions, size))
+        self.count = 0
+
+    def update(self, rows):
+        rows = np.asarray(rows, dtype=np.int64)
+        if rows.ndim == 1:
+            rows = rows[:, np.newaxis]
+        if len(rows) == 0:
+            return
+
+        # 新しい回ほど重み1に近い
+        weights = self.decay ** np.arange(len(rows) - 1, -1, -1)
+        self.values *= self.decay ** len(rows)
+        if self.positions is None:
+            self.values += np.bincount(rows.ravel(), weights=np.repeat(weights, rows.shape[1]),
+                                       minlength=self.size)[:self.size]
+        else:
+            for position in range(self.positions):
+                self.values[position] += np.bincount(rows[:, position], weights=weights,
+                                                     minlength=self.size)[:self.size]
+        self.count += len(rows)
+
+
+class TransitionModel:
+    # ナンバーズ: 桁ごとの 10×10 遷移行列 / ロト: 前回の本数字 -> 今回の本数字 の共起行列
+    def __init__(self, size, positions=None):
+        self.size = size
+        self.positions = positions
+        shape = (size, size) if positions is None else (positions, size, size)
+        self.counts = np.zeros(shape, dtype=np.int64)
+        self.last = None
+
+    def update(self, rows):
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) == 0:
+            return
+
+        sequence = rows if self.last is None else np.vstack([self.last[np.newaxis, :], rows])
+        if self.positions is None:
+            # 浮動小数点の行列積 (BLAS) で集計し、整数に戻す
+            presence = np.zeros((len(sequence), self.size))
+            presence[np.arange(len(sequence))[:, np.newaxis], sequence] = 1
+            self.counts += np.rint(presence[:-1].T @ presence[1:]).astype(np.int64)
+        else:
+            for position in range(self.positions):
+                pairs = sequence[:-1, position] * self.size + sequence[1:, position]
+                self.counts[position] += np.bincount(pairs, minlength=self.size * self.size).reshape(self.size, self.size)
+        self.last = rows[-1].copy()
+
+    def next_probabilities(self, smoothing=1.0):
+        if self.positions is None:
+            scores = self.counts[self.last].sum(axis=0)[1:] + smoothing
+            return scores / scores.sum()
+        scores = self.counts[np.arange(self.positions), self.last] + smoothing
+        return scores / scores.sum(axis=1, keepdims=True)
+
+    def sample(self, count, picks=None, smoothing=1.0):
+        probabilities = self.next_probabilities(smoothing)
+        if self.positions is None:
+            # Gumbel-top-k で重複なしの組を一括抽出（確率の高い順に並ぶ）
+            keys = np.log(probabilities) + np.random.gumbel(size=(count, len(probabilities)))
+            top = np.argpartition(-keys, picks - 1, axis=1)[:, :picks]
+            order = np.argsort(-np.take_along_axis(keys, top, axis=1), axis=1)
+            return np.take_along_axis(top, order, axis=1) + 1
+
+        cumulative = probabilities.cumsum(axis=1)
+        draws = np.random.random((count, self.positions, 1))
+        digits = (draws > cumulative[np.newaxis, :, :]).sum(axis=2)
+        return np.minimum(digits, self.size - 1)
+
+
+def target_indices(lottery_type, df):
+    # 抽選ごとの出現対象の番号 (ロト: 数字-1, ナンバーズ: 桁×10+数字) と対象数
+    if lottery_type in NUMBERS_GAMES:
+        digits = NUMBERS_GAMES[lottery_type]['digits']
+        place_values = 10 ** np.arange(digits - 1, -1, -1)
+        values = (df['number'].to_numpy(dtype=np.int64)[:, np.newaxis] // place_values) % 10
+        return values + np.arange(digits) * 10, digits * 10
+
+    game = LOTO_GAMES[lottery_type]
+    columns = [f"{game['prefix']}{i}" for i in range(1, game['picks'] + 1)]
+    return df[columns].to_numpy(dtype=np.int64) - 1, game['number_range']
+
+
+def target_presence(lottery_type, df):
+    # 抽選 × 対象 (ロト: 数字, ナンバーズ: 桁×数字) の出現有無
+    targets, size = target_indices(lottery_type, df)
+    presence = np.zeros((len(df), size), dtype=bool)
+    presence[np.arange(len(df))[:, np.newaxis], targets] = True
+    return presence
+
+
+def loto_main_numbers(lottery_type, df):
+    # 本数字の列がすべて揃い、整数で範囲内の場合のみ (抽選 × 本数字) の配列を返す
+    game = LOTO_GAMES[lottery_type]
+    columns = [f"{game['prefix']}{i}" for i in range(1, game['picks'] + 1)]
+    if not all(col in df.columns and pd.api.types.is_integer_dtype(df[col]) for col in columns):
+        return None
+    numbers = df[columns].to_numpy()
+    if numbers.size and (numbers.min() < 1 or numbers.max() > game['number_range']):
+        return None
+    return numbers
+
+
+def build_load_indexes(lottery_type, df):
+    # 読み込み時に作成するインデックス（LotteryAnalyzer の属性名 -> インデックス）
+    # 列を絞り込んだ読み込みや欠損のあるデータではロトのインデックスを作らない
+    if lottery_type in LOTO_GAMES:
+        numbers = loto_main_numbers(lottery_type, df)
+        if numbers is None:
+            return {}
+        index = NumberIndex(LOTO_GAMES[lottery_type]['number_range'])
+        index.extend(numbers)
+        return {'number_indexes': index}
+    if lottery_type in NUMBERS_GAMES and 'number' in df.columns:
+        index = NumbersIndex(NUMBERS_GAMES[lottery_type]['digits'])
+        index.extend(df['number'].to_numpy())
+        return {'numbers_indexes': index}
+    return {}
+
+
+def prepare_draws(lottery_type, df, quarantine=False):
+    # 読み込んだ DataFrame を検査・変換し、登録するデータとインデックスを返す（登録は呼び出し側）
+    df = df.reset_index(drop=True)
+    quarantined = None
+    if quarantine:
+        # 不正な行は読み込まず quarantined に退避（日付の変換前に検査する）
+        df, quarantined = quarantine_draws(df, validate_draws(lottery_type, df))
+    if 'date' in df.columns:
+        df['date'] = pd.to_datetime(df['date'])
+    df = compact_draws(lottery_type, df)
+    return {'data': df, 'quarantined': quarantined, 'indexes': build_load_indexes(lottery_type, df)}
+
+
+def shared_cache(method):
+    # オーバーレイでベースと共有中のゲームは、ベース側で計算・キャッシュする（全セッションで共有）
+    @functools.wraps(method)
+    def wrapper(self, lottery_type, *args, **kwargs):
+        if lottery_type in self.shared_types:
+            return getattr(self.base, method.__name__)(lottery_type, *args, **kwargs)
+        # 複数のセッションから同時に呼ばれても、同じキャッシュは1度だけ作る
+        with self._cache_lock(method.__name__, lottery_type):
+            return method(self, lottery_type, *args, **kwargs)
+    return wrapper
+
+
 class LotteryAnalyzer:
     def __init__(self):
+        self.base = None
+        self.shared_types = set()
+        self._locks = {}
+        self._locks_guard = threading.Lock()
         self.data = {}
+        self.quarantined = {}
+        self.bitmasks = {}
+        self.number_indexes = {}
+        self.numbers_indexes = {}
+        self.decayed_frequencies = {}
+        self.transition_models = {}
+        self.ml_predictors = {}
+        self.frequency_curves = {}
+        self.significance_results = {}
         self.day_mapping = {
             'Monday': '月', 'Tuesday': '火', 'Wednesday': '水',
             'Thursday': '木', 'Friday': '金', 'Saturday': '土', 'Sunday': '日'
         }
     
-    def load_data(self, lottery_type, csv_path):
-        self.data[lottery_type] = pd.read_csv(csv_path, encoding='utf-8')
-        self.data[lottery_type]['date'] = pd.to_datetime(self.data[lottery_type]['date'])
+    def _cache_lock(self, name, lottery_type):
+        with self._locks_guard:
+            return self._locks.setdefault((name, lottery_type), threading.Lock())
+
+    def overlay(self):
+        # このインスタンスを読み取り専用のベースとして共有し、読み込み・追加は自分の側だけに反映する
+        overlay = LotteryAnalyzer()
+        overlay.base = self
+        overlay.shared_types = set(self.data)
+        for name in ('data', 'quarantined', 'bitmasks', 'number_indexes', 'numbers_indexes'):
+            getattr(overlay, name).update(getattr(self, name))
+        return overlay
+
+    def load_data(self, lottery_type, csv_path, columns=None, start_date=None, end_date=None, recent_count=None,
+                  quarantine=False):
+        df = read_draws(csv_path, columns, start_date, end_date, recent_count,
+                        date_errors='coerce' if quarantine else 'raise')
+        return self.load_frame(lottery_type, df, quarantine)
+
+    def load_frame(self, lottery_type, df, quarantine=False):
+        self._register(lottery_type, prepare_draws(lottery_type, df, quarantine))
         return len(self.data[lottery_type])
+
+    def _register(self, lottery_type, prepared):
+        if prepared['quarantined'] is not None:
+            self.quarantined[lottery_type] = prepared['quarantined']
+        self._set_data(lottery_type, prepared['data'], prepared['indexes'])
+
+    def validate_data(self, lottery_type):
+        if lottery_type not in self.data:
+            return None
+        return validate_draws(lottery_type, self.data[lottery_type])
+
+    def load_many(self, sources, max_workers=None):
+        # 読み込みとインデックス作成はスレッドで並列に行い、結果の登録はこのスレッドで行う
+        def load(lottery_type, source):
+            # source はファイルパス、または load_data の引数の辞書
+            options = dict(source) if isinstance(source, dict) else {'csv_path': source}
+            quarantine = options.pop('quarantine', False)
+            df = read_draws(options.pop('csv_path'), **options, date_errors='coerce' if quarantine else 'raise')
+            return prepare_draws(lottery_type, df, quarantine)
+
+        counts = {}
+        errors = {}
+        with ThreadPoolExecutor(max_workers=max_workers or len(sources) or 1) as executor:
+            futures = {
+                lottery_type: executor.submit(load, lottery_type, source)
+                for lottery_type, source in sources.items()
+            }
+            for lottery_type, future in futures.items():
+                try:
+                    prepared = future.result()
+                except FileNotFoundError as e:
+                    errors[lottery_type] = f"ファイルが見つかりません: {e.filename}"
+                    continue
+                except Exception as e:
+                    errors[lottery_type] = f"{type(e).__name__}: {e}"
+                    continue
+                self._register(lottery_type, prepared)
+                counts[lottery_type] = len(prepared['data'])
+        return counts, errors
+
+    def _set_data(self, lottery_type, df, indexes):
+        self.shared_types.discard(lottery_type)
+        self.data[lottery_type] = df
+        self._invalidate_indexes(lottery_type)
+        for name, index in indexes.items():
+            getattr(self, name)[lottery_type] = index
+
+    def append_draws(self, lottery_type, draws):
+        new_data = pd.DataFrame(draws).reset_index(drop=True)
+        if 'date' in new_data.columns:
+            new_data['date'] = pd.to_datetime(new_data['date'])
+        new_data = compact_draws(lottery_type, new_data)
+
+        if lottery_type not in self.data:
+            self.data[lottery_type] = new_data
+            self._invalidate_indexes(lottery_type)
+            self._build_indexes(lottery_type)
+            return len(new_data)
+
+        current = self.data[lottery_type]
+        if 'day' in new_data.columns and 'day' in current.columns:
+            # カテゴリを揃えて連結後もカテゴリ型を保つ
+            categories = list(current['day'].cat.categories)
+            categories += [c for c in new_data['day'].cat.categories if c not in categories]
+            current = current.assign(day=current['day'].cat.set_categories(categories))
+            new_data = new_data.assign(day=new_data['day'].cat.set_categories(categories))
+        combined = pd.concat([current, new_data], ignore_index=True)
+        if not combined.dtypes.equals(current.dtypes):
+            combined = compact_draws(lottery_type, combined)
+        self.data[lottery_type] = combined
+        if lottery_type in self.shared_types:
+            # ベースと共有しているインデックスは書き換えず、自分の側に作り直す
+            self.shared_types.discard(lottery_type)
+            self._invalidate_indexes(lottery_type)
+            self._build_indexes(lottery_type)
+        else:
+            self._extend_indexes(lottery_type, new_data)
+        return len(self.data[lottery_type])
+
+    def memory_report(self):
+        # ゲームごとの DataFrame と派生インデックスのバイト数
+        def nbytes(value):
+            if isinstance(value, np.ndarray):
+                return value.nbytes
+            if isinstance(value, dict):
+                return sum(nbytes(v) for v in value.values())
+            if isinstance(value, (list, tuple)):
+                return sum(nbytes(v) for v in value)
+            if hasattr(value, '__dict__'):
+                return nbytes(vars(value))
+            return 0
+
+        report = {}
+        for lottery_type, df in self.data.items():
+            columns = df.memory_usage(deep=True, index=False)
+            indexes = {
+                'bitmasks': nbytes(self.bitmasks.get(lottery_type)),
+                'number_index': nbytes(self.number_indexes.get(lottery_type)),
+                'numbers_index': nbytes(self.numbers_indexes.get(lottery_type)),
+                'decayed_frequencies': nbytes([
+                    state for key, state in self.decayed_frequencies.items() if key[0] == lottery_type
+                ]),
+                'transition_model': nbytes(self.transition_models.get(lottery_type)),
+                'ml_predictor': nbytes(self.ml_predictors.get(lottery_type)),
+                'frequency_curves': nbytes([
+                    curves for key, curves in self.frequency_curves.items() if key[0] == lottery_type
+                ]),
+                'significance_results': nbytes([
+                    result for key, result in self.significance_results.items() if key[0] == lottery_type
+                ]),
+            }
+            report[lottery_type] = {
+                'rows': len(df),
+                'columns': {col: int(size) for col, size in columns.items()},
+                'data': int(columns.sum()),
+                'indexes': indexes,
+                'total': int(columns.sum()) + sum(indexes.values()),
+            }
+        return report
+
+    def _main_number_columns(self, lottery_type):
+        game = LOTO_GAMES[lottery_type]
+        return [f"{game['prefix']}{i}" for i in range(1, game['picks'] + 1)]
+
+    def _invalidate_indexes(self, lottery_type):
+        self.bitmasks.pop(lottery_type, None)
+        self.number_indexes.pop(lottery_type, None)
+        self.numbers_indexes.pop(lottery_type, None)
+        self.transition_models.pop(lottery_type, None)
+        self.ml_predictors.pop(lottery_type, None)
+        self._drop_frequency_curves(lottery_type)
+        for key in [key for key in self.decayed_frequencies if key[0] == lottery_type]:
+            del self.decayed_frequencies[key]
+
+    def _build_indexes(self, lottery_type):
+        for name, index in build_load_indexes(lottery_type, self.data[lottery_type]).items():
+            getattr(self, name)[lottery_type] = index
+
+    def _drop_frequency_curves(self, lottery_type):
+        for key in [key for key in self.frequency_curves if key[0] == lottery_type]:
+            del self.frequency_curves[key]
+        for key in [key for key in self.significance_results if key[0] == lottery_type]:
+            del self.significance_results[key]
+
+    def _extend_indexes(self, lottery_type, new_data):
+        self._drop_frequency_curves(lottery_type)
+
+        for key, state in self.decayed_frequencies.items():
+            if key[0] == lottery_type:
+                state.update(self._decay_rows(lottery_type, key[1], new_data))
+
+        if lottery_type in self.transition_models:
+            self.transition_models[lottery_type].update(self._transition_rows(lottery_type, new_data))
+
+        if lottery_type in self.ml_predictors:
+            self.ml_predictors[lottery_type].update(self.data[lottery_type], len(new_data))
+
+        if lottery_type in NUMBERS_GAMES:
+            if 'number' in new_data.columns:
+                index = self.numbers_indexes.setdefault(
+                    lottery_type, NumbersIndex(NUMBERS_GAMES[lottery_type]['digits'])
+                )
+                index.extend(new_data['number'].to_numpy())
+            return
+
+        if lottery_type not in LOTO_GAMES:
+            return
+
+        game = LOTO_GAMES[lottery_type]
+        main_numbers = loto_main_numbers(lottery_type, new_data)
+        if main_numbers is None or lottery_type not in self.number_indexes:
+            # 追加分か既存分にインデックスを作れない値がある場合は全体から作り直す
+            self.bitmasks.pop(lottery_type, None)
+            self.number_indexes.pop(lottery_type, None)
+            self._build_indexes(lottery_type)
+            return
+
+        self.number_indexes[lottery_type].extend(main_numbers)
+
+        if lottery_type in self.bitmasks:
+            masks = self.bitmasks[lottery_type]
+            masks['main'] = np.concatenate([masks['main'], encode_bitmasks(main_numbers)])
+            masks['bonus'] = np.concatenate([
+                masks['bonus'], encode_bitmasks(new_data[game['bonus_columns']].to_numpy())
+            ])
+
+    def save_data(self, lottery_type, path):
+        if lottery_type not in self.data:
+            return 0
+        df = self.data[lottery_type].copy()
+        if detect_file_format(path) == 'csv' and 'date' in df.columns:
+            df['date'] = df['date'].dt.strftime('%Y-%m-%d')
+        write_draws(df, path)
+        return len(df)
     
     def get_recent_data(self, lottery_type, recent_count=50):
         if lottery_type not in self.data:
             return None
         return self.data[lottery_type].tail(recent_count)
     
-    def analyze_frequency(self, lottery_type, numbers_column_prefix, number_range, recent_count=30):
+    def _decay_rows(self, lottery_type, numbers_column_prefix, data):
+        if numbers_column_prefix is None:
+            # ナンバーズは桁ごとの数字
+            digits = NUMBERS_GAMES[lottery_type]['digits']
+            place_values = 10 ** np.arange(digits - 1, -1, -1)
+            return (data['number'].to_numpy(dtype=np.int64)[:, np.newaxis] // place_values) % 10
+        columns = [col for col in data.columns if col.startswith(numbers_column_prefix)]
+        return data[columns].to_numpy(dtype=np.int64)
+    
+    @shared_cache
+    def get_decayed_frequency(self, lottery_type, half_life, numbers_column_prefix=None, number_range=None):
+        if lottery_type not in self.data:
+            return None
+        
+        key = (lottery_type, numbers_column_prefix, half_life)
+        if key not in self.decayed_frequencies:
+            if numbers_column_prefix is None:
+                state = DecayedFrequency(10, half_life, positions=NUMBERS_GAMES[lottery_type]['digits'])
+            else:
+                state = DecayedFrequency(number_range + 1, half_life)
+            state.update(self._decay_rows(lottery_type, numbers_column_prefix, self.data[lottery_type]))
+            self.decayed_frequencies[key] = state
+        return self.decayed_frequencies[key]
+    
+    def _frequency_label(self, freq, recent_count, half_life):
+        if half_life is not None:
+            return f"半減期{half_life}回の減衰頻度{freq:.2f}"
+        return f"過去{recent_count}回中{freq}回出現"
+    
+    def analyze_frequency(self, lottery_type, numbers_column_prefix, number_range, recent_count=30, half_life=None):
+        if half_life is not None:
+            state = self.get_decayed_frequency(lottery_type, half_life, numbers_column_prefix, number_range)
+            if state is None:
+                return {}
+            return {i: float(state.values[i]) for i in range(1, number_range + 1)}
+        
         recent_data = self.get_recent_data(lottery_type, recent_count)
         if recent_data is None:
             return {}
@@ -40,6 +819,116 @@ class LotteryAnalyzer:
         
         return frequency
     
+    def _number_presence(self, data, numbers_column_prefix, number_range):
+        # 抽選 × 数字 の出現回数（範囲外の数字は無視）
+        columns = [col for col in data.columns if col.startswith(numbers_column_prefix)]
+        numbers = data[columns].to_numpy(dtype=np.int64)
+        numbers = np.where((numbers >= 1) & (numbers <= number_range), numbers, 0)
+        presence = np.zeros((len(data), number_range + 1), dtype=np.int32)
+        np.add.at(presence, (np.arange(len(data))[:, np.newaxis], numbers), 1)
+        return presence[:, 1:]
+    
+    @shared_cache
+    def get_frequency_curves(self, lottery_type, numbers_column_prefix, number_range, max_count=100):
+        # curves[n - 1] が直近 n 回の数字別出現回数（全スライダー値を1回の累積和で計算）
+        # 行数は min(max_count, 抽選数)。抽選数を超える n の集計は作らない
+        if lottery_type not in self.data:
+            return None
+        
+        key = (lottery_type, numbers_column_prefix, number_range, max_count)
+        if key not in self.frequency_curves:
+            recent_data = self.data[lottery_type].tail(max_count)
+            presence = self._number_presence(recent_data, numbers_column_prefix, number_range)
+            self.frequency_curves[key] = np.cumsum(presence[::-1], axis=0)
+        return self.frequency_curves[key]
+    
+    @shared_cache
+    def analyze_rolling_frequency(self, lottery_type, numbers_column_prefix, number_range, window=30, points=100):
+        # 数字 × 時点 のヒートマップ用に、等間隔の時点での直近 window 回の出現回数を集計
+        if lottery_type not in self.data:
+            return None
+        
+        data = self.data[lottery_type]
+        if len(data) < window:
+            return None
+        
+        key = (lottery_type, 'rolling', numbers_column_prefix, number_range, window, points)
+        if key not in self.frequency_curves:
+            presence = self._number_presence(data, numbers_column_prefix, number_range)
+            cumulative = np.vstack([np.zeros((1, number_range), dtype=np.int64), np.cumsum(presence, axis=0)])
+            ends = np.unique(np.linspace(window, len(data), min(points, len(data) - window + 1)).astype(np.int64))
+            self.frequency_curves[key] = {
+                'dates': data['date'].iloc[ends - 1].dt.strftime('%Y-%m-%d').tolist(),
+                'numbers': list(range(1, number_range + 1)),
+                'counts': (cumulative[ends] - cumulative[ends - window]).T,
+            }
+        return self.frequency_curves[key]
+    
+    @shared_cache
+    def analyze_significance(self, lottery_type, windows=None):
+        # 集計期間ごとの出現回数と曜日別の出現回数の偏りを検定（データが変わるまでキャッシュ）
+        if lottery_type not in self.data or (lottery_type not in LOTO_GAMES and lottery_type not in NUMBERS_GAMES):
+            return None
+        
+        # scipy は検定を使う場合のみ読み込む
+        import lottery_stats
+        
+        windows = tuple(windows) if windows is not None else lottery_stats.DEFAULT_WINDOWS
+        key = (lottery_type, windows)
+        if key not in self.significance_results:
+            data = self.data[lottery_type]
+            targets, _ = target_indices(lottery_type, data)
+            result = {'frequency': lottery_stats.frequency_significance(targets, lottery_type, windows)}
+            if 'date' in data.columns and len(data):
+                weekdays = data['date'].dt.dayofweek.to_numpy(dtype=np.int64)
+                result['weekday'] = lottery_stats.weekday_significance(targets, weekdays, lottery_type)
+            self.significance_results[key] = result
+        return self.significance_results[key]
+    
+    def _group_p_text(self, lottery_type, adjusted):
+        # カイ二乗検定の補正後 p 値（ナンバーズは桁ごと）
+        if lottery_type in NUMBERS_GAMES:
+            return " / ".join(f"{i+1}桁目 補正後p={p:.3f}" for i, p in enumerate(adjusted))
+        return f"補正後p={adjusted[0]:.3f}"
+    
+    def significance_summary(self, lottery_type, prediction, recent_count=30):
+        # 予想した数字の、直近 recent_count 回での偏りの検定結果
+        result = self.analyze_significance(lottery_type)
+        if result is None or not result['frequency']['windows']:
+            return ""
+        
+        # データが少ない場合は集計できる最長の期間を使う
+        frequency = result['frequency']
+        windows = frequency['windows']
+        row = max(np.searchsorted(windows, recent_count, side='right') - 1, 0)
+        recent_count = windows[row]
+        if lottery_type in NUMBERS_GAMES:
+            targets = [position * 10 + int(digit) for position, digit in enumerate(prediction)]
+        else:
+            targets = [int(num) - 1 for num in prediction]
+        
+        lines = []
+        for target in targets:
+            significant = "有意" if frequency['significant'][row, target] else "有意差なし"
+            lines.append(
+                f"{frequency['labels'][target]}: {frequency['counts'][row, target]}回 "
+                f"(期待値{frequency['expected'][row, target]:.1f}, p={frequency['p_values'][row, target]:.3f}, "
+                f"補正後p={frequency['adjusted'][row, target]:.3f}, {significant})"
+            )
+        lines.append(
+            f"直近{recent_count}回の全体の偏り (カイ二乗検定): "
+            f"{self._group_p_text(lottery_type, frequency['chi2_adjusted'][row])}"
+        )
+        
+        if 'weekday' in result:
+            weekday = result['weekday']
+            lines.append("曜日別の偏り (カイ二乗検定):")
+            lines.extend(
+                f"  {self.day_mapping[day]}: {self._group_p_text(lottery_type, adjusted)}"
+                for day, adjusted in zip(weekday['days'], weekday['chi2_adjusted'])
+            )
+        return "\n".join(lines)
+    
     def analyze_day_tendency(self, lottery_type, numbers_column_prefix, number_range):
         if lottery_type not in self.data:
             return {}
@@ -58,11 +947,11 @@ class LotteryAnalyzer:
         
         return day_stats
     
-    def predict_loto6(self, recent_count=30):
+    def predict_loto6(self, recent_count=30, half_life=None):
         if 'loto6' not in self.data:
             return None, "データが読み込まれていません"
         
-        frequency = self.analyze_frequency('loto6', 'loto6_', 43, recent_count)
+        frequency = self.analyze_frequency('loto6', 'loto6_', 43, recent_count, half_life)
         day_stats = self.analyze_day_tendency('loto6', 'loto6_', 43)
         
         recent_data = self.get_recent_data('loto6', recent_count)
@@ -86,15 +975,15 @@ class LotteryAnalyzer:
         bonus_weights = {k: v for k, v in weights.items() if k not in prediction}
         bonus = max(bonus_weights.items(), key=lambda x: x[1])[0]
         
-        explanation = self._generate_loto6_explanation(prediction, bonus, frequency, recent_count)
+        explanation = self._generate_loto6_explanation(prediction, bonus, frequency, recent_count, half_life)
         
         return (prediction, bonus), explanation
     
-    def predict_loto7(self, recent_count=30):
+    def predict_loto7(self, recent_count=30, half_life=None):
         if 'loto7' not in self.data:
             return None, "データが読み込まれていません"
         
-        frequency = self.analyze_frequency('loto7', 'loto7_', 37, recent_count)
+        frequency = self.analyze_frequency('loto7', 'loto7_', 37, recent_count, half_life)
         day_stats = self.analyze_day_tendency('loto7', 'loto7_', 37)
         
         recent_data = self.get_recent_data('loto7', recent_count)
@@ -120,97 +1009,361 @@ class LotteryAnalyzer:
         remaining_numbers.remove(bonus1)
         bonus2 = random.choice(remaining_numbers)
         
-        explanation = self._generate_loto7_explanation(prediction, [bonus1, bonus2], frequency, recent_count)
+        explanation = self._generate_loto7_explanation(prediction, [bonus1, bonus2], frequency, recent_count, half_life)
         
         return (prediction, [bonus1, bonus2]), explanation
     
-    def predict_numbers3(self, recent_count=30):
-        if 'numbers3' not in self.data:
+    def predict_numbers3(self, recent_count=30, box_weighting=False, half_life=None):
+        return self._predict_numbers('numbers3', recent_count, box_weighting, half_life)
+    
+    def predict_numbers4(self, recent_count=30, box_weighting=False, half_life=None):
+        return self._predict_numbers('numbers4', recent_count, box_weighting, half_life)
+    
+    def _predict_numbers(self, lottery_type, recent_count, box_weighting, half_life=None):
+        if lottery_type not in self.data:
             return None, "データが読み込まれていません"
         
-        recent_data = self.get_recent_data('numbers3', recent_count)
+        digits = NUMBERS_GAMES[lottery_type]['digits']
         
-        digit_frequency = {0: Counter(), 1: Counter(), 2: Counter()}
+        digit_frequency = {i: Counter() for i in range(digits)}
         
-        for _, row in recent_data.iterrows():
-            number = str(row['number']).zfill(3)
-            for i, digit in enumerate(number):
-                digit_frequency[i][int(digit)] += 1
+        if half_life is not None:
+            state = self.get_decayed_frequency(lottery_type, half_life)
+            for i in range(digits):
+                digit_frequency[i].update({d: v for d, v in enumerate(state.values[i]) if v > 0})
+        else:
+            recent_data = self.get_recent_data(lottery_type, recent_count)
+            for _, row in recent_data.iterrows():
+                number = str(row['number']).zfill(digits)
+                for i, digit in enumerate(number):
+                    digit_frequency[i][int(digit)] += 1
         
-        prediction = ""
-        explanations = []
+        if box_weighting and lottery_type in self.numbers_indexes:
+            prediction = self._choose_box_weighted(lottery_type, digit_frequency)
+            explanations = [
+                f"{i+1}桁目: {digit} ({self._frequency_label(digit_frequency[i][int(digit)], recent_count, half_life)})"
+                for i, digit in enumerate(prediction)
+            ]
+        else:
+            prediction = ""
+            explanations = []
+            
+            for i in range(digits):
+                most_common = digit_frequency[i].most_common(3)
+                weights = [freq for _, freq in most_common]
+                if weights:
+                    total_weight = sum(weights)
+                    probabilities = [w / total_weight for w in weights]
+                    chosen_digit = np.random.choice([digit for digit, _ in most_common], p=probabilities)
+                    prediction += str(chosen_digit)
+                    explanations.append(f"{i+1}桁目: {chosen_digit} ({self._frequency_label(digit_frequency[i][chosen_digit], recent_count, half_life)})")
+                else:
+                    digit = random.randint(0, 9)
+                    prediction += str(digit)
+                    explanations.append(f"{i+1}桁目: {digit} (ランダム選択)")
         
-        for i in range(3):
-            most_common = digit_frequency[i].most_common(3)
-            weights = [freq for _, freq in most_common]
-            if weights:
-                total_weight = sum(weights)
-                probabilities = [w / total_weight for w in weights]
-                chosen_digit = np.random.choice([digit for digit, _ in most_common], p=probabilities)
-                prediction += str(chosen_digit)
-                explanations.append(f"{i+1}桁目: {chosen_digit} (過去{recent_count}回中{digit_frequency[i][chosen_digit]}回出現)")
-            else:
-                digit = random.randint(0, 9)
-                prediction += str(digit)
-                explanations.append(f"{i+1}桁目: {digit} (ランダム選択)")
+        history = self.lookup_number(lottery_type, prediction)
+        if history is not None:
+            explanations.append(
+                f"ストレート: 全{history['total']}回中{history['straight_count']}回出現 / "
+                f"ボックス: {history['box_count']}回出現"
+            )
         
         explanation = "\n".join(explanations)
         
         return prediction, explanation
     
-    def predict_numbers4(self, recent_count=30):
-        if 'numbers4' not in self.data:
+    def _choose_box_weighted(self, lottery_type, digit_frequency):
+        # 桁別の出現率の積に、ボックスの期待値に対する出現比率を掛けた重みで選択
+        index = self.numbers_indexes[lottery_type]
+        space = len(index.straight_counts)
+        
+        scores = np.ones(space)
+        for i in range(index.digits):
+            counts = np.array([digit_frequency[i][d] for d in range(10)], dtype=float) + 1
+            scores *= (counts / counts.sum())[index.digit_table[:, i]]
+        
+        expected = index.size * index.box_sizes / space
+        scores *= (index.box_counts[index.box_keys] + 1) / (expected + 1)
+        
+        # 同点は番号順（安定ソート）
+        candidates = np.argsort(scores, kind='stable')[-10:]
+        probabilities = scores[candidates] / scores[candidates].sum()
+        chosen = np.random.choice(candidates, p=probabilities)
+        return str(chosen).zfill(index.digits)
+    
+    def lookup_number(self, lottery_type, number):
+        index = self.numbers_indexes.get(lottery_type)
+        if index is None:
+            return None
+        
+        number = int(number)
+        if number < 0 or number >= len(index.straight_counts):
+            raise ValueError(f"{lottery_type}の番号は{index.digits}桁以内で指定してください")
+        
+        result = index.lookup(number)
+        result['total'] = index.size
+        dates = self.data[lottery_type]['date'] if 'date' in self.data[lottery_type].columns else None
+        for key in ['straight_last', 'box_last']:
+            draw_id = result[key]
+            result[f"{key}_date"] = dates.iloc[draw_id] if dates is not None and draw_id >= 0 else None
+        return result
+    
+    def _transition_rows(self, lottery_type, data):
+        if lottery_type in NUMBERS_GAMES:
+            return self._decay_rows(lottery_type, None, data)
+        return data[self._main_number_columns(lottery_type)].to_numpy(dtype=np.int64)
+    
+    @shared_cache
+    def get_transition_model(self, lottery_type):
+        if lottery_type not in self.data or (lottery_type not in LOTO_GAMES and lottery_type not in NUMBERS_GAMES):
+            return None
+        
+        if lottery_type not in self.transition_models:
+            if lottery_type in NUMBERS_GAMES:
+                model = TransitionModel(10, positions=NUMBERS_GAMES[lottery_type]['digits'])
+            else:
+                model = TransitionModel(LOTO_GAMES[lottery_type]['number_range'] + 1)
+            model.update(self._transition_rows(lottery_type, self.data[lottery_type]))
+            self.transition_models[lottery_type] = model
+        return self.transition_models[lottery_type]
+    
+    def sample_transition_tickets(self, lottery_type, count):
+        model = self.get_transition_model(lottery_type)
+        if model is None or model.last is None:
+            return None
+        
+        if lottery_type in NUMBERS_GAMES:
+            digits = NUMBERS_GAMES[lottery_type]['digits']
+            return (model.sample(count) * 10 ** np.arange(digits - 1, -1, -1)).sum(axis=1)
+        return np.sort(model.sample(count, picks=LOTO_GAMES[lottery_type]['picks']), axis=1)
+    
+    def predict_loto6_transition(self):
+        return self._predict_loto_transition('loto6')
+    
+    def predict_loto7_transition(self):
+        return self._predict_loto_transition('loto7')
+    
+    def predict_numbers3_transition(self):
+        return self._predict_numbers_transition('numbers3')
+    
+    def predict_numbers4_transition(self):
+        return self._predict_numbers_transition('numbers4')
+    
+    def _predict_loto_transition(self, lottery_type):
+        model = self.get_transition_model(lottery_type)
+        if model is None or model.last is None:
             return None, "データが読み込まれていません"
         
-        recent_data = self.get_recent_data('numbers4', recent_count)
+        game = LOTO_GAMES[lottery_type]
+        bonus_count = len(game['bonus_columns'])
+        numbers = [int(n) for n in model.sample(1, picks=game['picks'] + bonus_count)[0]]
+        prediction, bonus = numbers[:game['picks']], numbers[game['picks']:]
         
-        digit_frequency = {0: Counter(), 1: Counter(), 2: Counter(), 3: Counter()}
+        probabilities = model.next_probabilities()
+        last_draw = ", ".join(str(n) for n in sorted(model.last))
+        explanations = [f"前回の本数字: {last_draw}"]
+        for num in prediction:
+            explanations.append(f"数字 {num}: 前回からの遷移確率 {probabilities[num - 1]:.3f}")
+        for i, num in enumerate(bonus):
+            label = "ボーナス" if bonus_count == 1 else f"ボーナス{i+1}"
+            explanations.append(f"{label} {num}: 前回からの遷移確率 {probabilities[num - 1]:.3f}")
         
-        for _, row in recent_data.iterrows():
-            number = str(row['number']).zfill(4)
-            for i, digit in enumerate(number):
-                digit_frequency[i][int(digit)] += 1
+        if bonus_count == 1:
+            return (prediction, bonus[0]), "\n".join(explanations)
+        return (prediction, bonus), "\n".join(explanations)
+    
+    def _predict_numbers_transition(self, lottery_type):
+        model = self.get_transition_model(lottery_type)
+        if model is None or model.last is None:
+            return None, "データが読み込まれていません"
+        
+        digits = model.sample(1)[0]
+        prediction = "".join(str(d) for d in digits)
         
-        prediction = ""
         explanations = []
+        for i, digit in enumerate(digits):
+            previous = model.last[i]
+            transitions = model.counts[i, previous]
+            explanations.append(
+                f"{i+1}桁目: {digit} (前回の{previous}から{transitions.sum()}回中{transitions[digit]}回遷移)"
+            )
         
-        for i in range(4):
-            most_common = digit_frequency[i].most_common(3)
-            weights = [freq for _, freq in most_common]
-            if weights:
-                total_weight = sum(weights)
-                probabilities = [w / total_weight for w in weights]
-                chosen_digit = np.random.choice([digit for digit, _ in most_common], p=probabilities)
-                prediction += str(chosen_digit)
-                explanations.append(f"{i+1}桁目: {chosen_digit} (過去{recent_count}回中{digit_frequency[i][chosen_digit]}回出現)")
-            else:
-                digit = random.randint(0, 9)
-                prediction += str(digit)
-                explanations.append(f"{i+1}桁目: {digit} (ランダム選択)")
+        return prediction, "\n".join(explanations)
+    
+    @shared_cache
+    def get_ml_predictor(self, lottery_type):
+        if lottery_type not in self.data or (lottery_type not in LOTO_GAMES and lottery_type not in NUMBERS_GAMES):
+            return None
         
-        explanation = "\n".join(explanations)
+        if lottery_type not in self.ml_predictors:
+            # scikit-learn は機械学習モードを使う場合のみ読み込む
+            from lottery_ml import MLPredictor
+            self.ml_predictors[lottery_type] = MLPredictor(lottery_type).fit(self.data[lottery_type])
+        return self.ml_predictors[lottery_type]
+    
+    def predict_loto6_ml(self):
+        return self._predict_loto_ml('loto6')
+    
+    def predict_loto7_ml(self):
+        return self._predict_loto_ml('loto7')
+    
+    def predict_numbers3_ml(self):
+        return self._predict_numbers_ml('numbers3')
+    
+    def predict_numbers4_ml(self):
+        return self._predict_numbers_ml('numbers4')
+    
+    def _predict_loto_ml(self, lottery_type):
+        predictor = self.get_ml_predictor(lottery_type)
+        if predictor is None:
+            return None, "データが読み込まれていません"
         
-        return prediction, explanation
+        game = LOTO_GAMES[lottery_type]
+        probabilities = predictor.predict_proba(self.data[lottery_type])
+        ranked = [int(i) + 1 for i in np.argsort(-probabilities, kind='stable')]
+        prediction = ranked[:game['picks']]
+        bonus = ranked[game['picks']:game['picks'] + len(game['bonus_columns'])]
+        
+        explanations = [f"数字 {num}: 推定出現確率 {probabilities[num - 1]:.3f}" for num in prediction]
+        for i, num in enumerate(bonus):
+            label = "ボーナス" if len(bonus) == 1 else f"ボーナス{i+1}"
+            explanations.append(f"{label} {num}: 推定出現確率 {probabilities[num - 1]:.3f}")
+        
+        if len(bonus) == 1:
+            return (prediction, bonus[0]), "\n".join(explanations)
+        return (prediction, bonus), "\n".join(explanations)
+    
+    def _predict_numbers_ml(self, lottery_type):
+        predictor = self.get_ml_predictor(lottery_type)
+        if predictor is None:
+            return None, "データが読み込まれていません"
+        
+        digits = NUMBERS_GAMES[lottery_type]['digits']
+        probabilities = predictor.predict_proba(self.data[lottery_type]).reshape(digits, 10)
+        chosen = probabilities.argmax(axis=1)
+        prediction = "".join(str(d) for d in chosen)
+        
+        explanations = [
+            f"{i+1}桁目: {digit} (推定出現確率 {probabilities[i, digit]:.3f})"
+            for i, digit in enumerate(chosen)
+        ]
+        return prediction, "\n".join(explanations)
     
-    def _generate_loto6_explanation(self, prediction, bonus, frequency, recent_count):
+    def generate_wheel(self, lottery_type, pool_size=15, cover=2, recent_count=30, half_life=None,
+                       time_budget=5.0, workers=1):
+        # 出現頻度の上位 pool_size 個の全ての cover 個組を含む買い目を生成
+        if lottery_type not in LOTO_GAMES or lottery_type not in self.data:
+            return None, None
+        
+        game = LOTO_GAMES[lottery_type]
+        frequency = self.analyze_frequency(lottery_type, game['prefix'], game['number_range'], recent_count, half_life)
+        ranked = sorted(frequency.items(), key=lambda x: (-x[1], x[0]))
+        pool = sorted(num for num, _ in ranked[:pool_size])
+        tickets = lottery_wheel.generate_wheel(pool, game['picks'], cover, time_budget, workers)
+        return pool, tickets
+    
+    @shared_cache
+    def get_bitmasks(self, lottery_type):
+        if lottery_type not in LOTO_GAMES or lottery_type not in self.data:
+            return None
+
+        if lottery_type not in self.bitmasks:
+            game = LOTO_GAMES[lottery_type]
+            data = self.data[lottery_type]
+            main_numbers = loto_main_numbers(lottery_type, data)
+            bonus_ok = all(col in data.columns and pd.api.types.is_integer_dtype(data[col])
+                           for col in game['bonus_columns'])
+            if main_numbers is None or not bonus_ok:
+                return None
+            self.bitmasks[lottery_type] = {
+                'main': encode_bitmasks(main_numbers),
+                'bonus': encode_bitmasks(data[game['bonus_columns']].to_numpy()),
+            }
+        return self.bitmasks[lottery_type]
+
+    def find_draws(self, lottery_type, numbers, min_matches=None):
+        index = self.number_indexes.get(lottery_type)
+        if index is None:
+            return None
+
+        numbers = [int(n) for n in numbers]
+        invalid = [n for n in numbers if n < 1 or n > index.number_range]
+        if invalid:
+            raise ValueError(f"{lottery_type}の数字は1〜{index.number_range}の範囲で指定してください: {invalid}")
+
+        if min_matches is None:
+            return index.draws_with_all(numbers)
+        return index.draws_with_at_least(numbers, min_matches)
+
+    def check_tickets(self, lottery_type, tickets, summary=False):
+        masks = self.get_bitmasks(lottery_type)
+        if masks is None:
+            return None
+
+        game = LOTO_GAMES[lottery_type]
+        tickets = np.asarray(tickets)
+        if tickets.ndim == 1:
+            tickets = tickets[np.newaxis, :]
+        if tickets.shape[1] != game['picks']:
+            raise ValueError(f"{lottery_type}のチケットは{game['picks']}個の数字が必要です")
+        if not np.issubdtype(tickets.dtype, np.number) or (tickets != np.floor(tickets)).any():
+            raise ValueError(f"{lottery_type}の数字は整数で指定してください")
+        if tickets.size and (tickets.min() < 1 or tickets.max() > game['number_range']):
+            raise ValueError(f"{lottery_type}の数字は1〜{game['number_range']}の範囲で指定してください")
+        if (np.diff(np.sort(tickets, axis=1), axis=1) == 0).any():
+            raise ValueError(f"{lottery_type}のチケットに重複した数字があります")
+
+        ticket_masks = encode_bitmasks(tickets)[:, np.newaxis]
+
+        if summary:
+            # 等級ごとの当選回数 (チケット数 × 等級数) のみを返す
+            table = PRIZE_TABLES[lottery_type].ravel()
+            tier_count = int(table.max())
+            key_to_tier = (table[:, np.newaxis] == np.arange(1, tier_count + 1)).astype(np.int32)
+
+            tier_counts = np.zeros((len(ticket_masks), tier_count), dtype=np.int32)
+            for start in range(0, len(ticket_masks), TICKET_CHUNK_SIZE):
+                chunk = ticket_masks[start:start + TICKET_CHUNK_SIZE]
+                keys = _match_keys(popcount(chunk & masks['main']), (chunk & masks['bonus']) != 0)
+                offsets = np.arange(len(chunk))[:, np.newaxis] * len(table)
+                key_counts = np.bincount((keys + offsets).ravel(), minlength=len(chunk) * len(table))
+                tier_counts[start:start + len(chunk)] = key_counts.reshape(len(chunk), len(table)) @ key_to_tier
+            return {'tier_counts': tier_counts}
+
+        # チケット × 抽選の中間配列が大きくならないよう分割して計算
+        shape = (len(ticket_masks), len(masks['main']))
+        matches = np.empty(shape, dtype=np.uint8)
+        bonus_matches = np.empty(shape, dtype=np.uint8)
+        for start in range(0, len(ticket_masks), TICKET_CHUNK_SIZE):
+            chunk = ticket_masks[start:start + TICKET_CHUNK_SIZE]
+            matches[start:start + len(chunk)] = popcount(chunk & masks['main'])
+            bonus_matches[start:start + len(chunk)] = popcount(chunk & masks['bonus'])
+        return {
+            'matches': matches,
+            'bonus_matches': bonus_matches,
+            'tiers': prize_tiers(lottery_type, matches, bonus_matches),
+        }
+
+    def _generate_loto6_explanation(self, prediction, bonus, frequency, recent_count, half_life=None):
         explanations = []
         for num in prediction:
             freq = frequency.get(num, 0)
-            explanations.append(f"数字 {num}: 過去{recent_count}回中{freq}回出現")
+            explanations.append(f"数字 {num}: {self._frequency_label(freq, recent_count, half_life)}")
         
         bonus_freq = frequency.get(bonus, 0)
-        explanations.append(f"ボーナス {bonus}: 過去{recent_count}回中{bonus_freq}回出現")
+        explanations.append(f"ボーナス {bonus}: {self._frequency_label(bonus_freq, recent_count, half_life)}")
         
         return "\n".join(explanations)
     
-    def _generate_loto7_explanation(self, prediction, bonus_list, frequency, recent_count):
+    def _generate_loto7_explanation(self, prediction, bonus_list, frequency, recent_count, half_life=None):
         explanations = []
         for num in prediction:
             freq = frequency.get(num, 0)
-            explanations.append(f"数字 {num}: 過去{recent_count}回中{freq}回出現")
+            explanations.append(f"数字 {num}: {self._frequency_label(freq, recent_count, half_life)}")
         
         for i, bonus in enumerate(bonus_list):
             bonus_freq = frequency.get(bonus, 0)
-            explanations.append(f"ボーナス{i+1} {bonus}: 過去{recent_count}回中{bonus_freq}回出現")
+            explanations.append(f"ボーナス{i+1} {bonus}: {self._frequency_label(bonus_freq, recent_count, half_life)}")
         
         return "\n".join(explanations)
\ No newline at end of file
@@ -0,0 +1,354 @@
+"""
+pandas・numpy を使わない軽量な分析エンジン
+標準ライブラリの csv と array だけで読み込み・出現頻度分析・予想を行い、
+LotteryAnalyzer と同じ結果を返す（起動時間が支配的な CLI・定期実行向け）
+"""
+
+import csv
+import os
+import random
+from array import array
+from collections import Counter
+from datetime import date
+from math import factorial
+
+LOTO_GAMES = {
+    'loto6': {'prefix': 'loto6_', 'number_range': 43, 'picks': 6, 'bonus_columns': ['bonus']},
+    'loto7': {'prefix': 'loto7_', 'number_range': 37, 'picks': 7, 'bonus_columns': ['bonus1', 'bonus2']},
+}
+
+NUMBERS_GAMES = {
+    'numbers3': {'digits': 3},
+    'numbers4': {'digits': 4},
+}
+
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+def parse_date(value):
+    """'YYYY-MM-DD'（時刻付きも可）を date に変換"""
+    return date.fromisoformat(value.strip()[:10])
+
+
+class DrawTable:
+    """列ごとの array に抽選結果を保持する
+
+    日付は date.toordinal() の値 (int32)、曜日は day_names の番号 (int8)、
+    数字・番号は uint16 で保持する
+    """
+
+    def __init__(self, columns, day_names=None):
+        self.columns = columns
+        self.day_names = day_names or list(WEEKDAYS)
+
+    def __len__(self):
+        for values in self.columns.values():
+            return len(values)
+        return 0
+
+    def tail(self, name, count):
+        """列 name の末尾 count 件（コピーしない memoryview）"""
+        values = memoryview(self.columns[name])
+        return values[max(len(values) - count, 0):] if count is not None else values
+
+    def date(self, row):
+        return date.fromordinal(self.columns['date'][row])
+
+    def day(self, row):
+        return self.day_names[self.columns['day'][row]]
+
+
+def read_draws(csv_path, columns=None, start_date=None, end_date=None, recent_count=None):
+    """CSV を DrawTable に読み込む（引数は lottery_analyzer.read_draws と同じ）"""
+    if os.path.splitext(str(csv_path))[1].lower() not in ('', '.csv', '.txt'):
+        raise ValueError("軽量エンジンは CSV ファイルのみ対応しています")
+
+    with open(csv_path, encoding='utf-8', newline='') as file:
+        reader = csv.reader(file)
+        header = next(reader)
+        names = list(columns) if columns is not None else header
+        positions = [header.index(name) for name in names]
+        # 行のリストを列のタプルに転置する
+        raw = list(zip(*(row for row in reader if row)))
+    raw = [raw[p] if raw else () for p in positions]
+
+    table = {}
+    day_names = list(WEEKDAYS)
+    for name, values in zip(names, raw):
+        if name == 'date':
+            table[name] = array('i', map(date.toordinal, map(parse_date, values)))
+        elif name == 'day':
+            for value in sorted(set(values) - set(day_names)):
+                day_names.append(value)
+            codes = {day: code for code, day in enumerate(day_names)}
+            table[name] = array('b', (codes[v] for v in values))
+        else:
+            table[name] = array('H', map(int, values))
+
+    keep = None
+    if 'date' in table and (start_date is not None or end_date is not None):
+        low = parse_date(str(start_date)).toordinal() if start_date is not None else None
+        high = parse_date(str(end_date)).toordinal() if end_date is not None else None
+        keep = [i for i, d in enumerate(table['date'])
+                if (low is None or d >= low) and (high is None or d <= high)]
+    if recent_count is not None:
+        keep = (keep if keep is not None else list(range(len(raw[0]))))[-recent_count:] if recent_count else []
+    if keep is not None:
+        table = {name: array(values.typecode, (values[i] for i in keep)) for name, values in table.items()}
+
+    return DrawTable(table, day_names)
+
+
+def box_size(number, digits):
+    """number の数字を並べ替えてできる番号の数"""
+    counts = Counter(str(number).zfill(digits))
+    size = factorial(digits)
+    for count in counts.values():
+        size //= factorial(count)
+    return size
+
+
+class CoreLotteryAnalyzer:
+    def __init__(self):
+        self.data = {}
+        self.numbers_indexes = {}
+        self.day_mapping = {
+            'Monday': '月', 'Tuesday': '火', 'Wednesday': '水',
+            'Thursday': '木', 'Friday': '金', 'Saturday': '土', 'Sunday': '日'
+        }
+
+    def load_data(self, lottery_type, csv_path, columns=None, start_date=None, end_date=None, recent_count=None):
+        self.data[lottery_type] = read_draws(csv_path, columns, start_date, end_date, recent_count)
+        self.numbers_indexes.pop(lottery_type, None)
+        return len(self.data[lottery_type])
+
+    def _prefix_columns(self, lottery_type, numbers_column_prefix):
+        return [name for name in self.data[lottery_type].columns if name.startswith(numbers_column_prefix)]
+
+    def _frequency_label(self, freq, recent_count, half_life):
+        if half_life is not None:
+            return f"半減期{half_life}回の減衰頻度{freq:.2f}"
+        return f"過去{recent_count}回中{freq}回出現"
+
+    def _decayed_counts(self, rows, size, half_life):
+        # 新しい回ほど重み1に近い指数減衰頻度
+        decay = 0.5 ** (1.0 / half_life)
+        values = [0.0] * size
+        last = len(rows) - 1
+        for t, row in enumerate(rows):
+            weight = decay ** (last - t)
+            for number in row:
+                if number < size:
+                    values[number] += weight
+        return values
+
+    def analyze_frequency(self, lottery_type, numbers_column_prefix, number_range, recent_count=30, half_life=None):
+        if lottery_type not in self.data:
+            return {}
+
+        table = self.data[lottery_type]
+        columns = self._prefix_columns(lottery_type, numbers_column_prefix)
+        if half_life is not None:
+            rows = list(zip(*(table.columns[name] for name in columns)))
+            values = self._decayed_counts(rows, number_range + 1, half_life)
+            return {i: values[i] for i in range(1, number_range + 1)}
+
+        frequency = {i: 0 for i in range(1, number_range + 1)}
+        for name in columns:
+            for number in table.tail(name, recent_count):
+                if number in frequency:
+                    frequency[number] += 1
+        return frequency
+
+    def analyze_day_tendency(self, lottery_type, numbers_column_prefix, number_range):
+        if lottery_type not in self.data:
+            return {}
+
+        table = self.data[lottery_type]
+        columns = [table.columns[name] for name in self._prefix_columns(lottery_type, numbers_column_prefix)]
+        day_stats = {day: {'total': 0, 'numbers': []} for day in WEEKDAYS}
+        for row, code in enumerate(table.columns['day']):
+            day = table.day_names[code]
+            if day in day_stats:
+                day_stats[day]['total'] += 1
+                day_stats[day]['numbers'].extend(values[row] for values in columns)
+        return day_stats
+
+    def _predict_loto(self, lottery_type, recent_count, half_life):
+        game = LOTO_GAMES[lottery_type]
+        number_range = game['number_range']
+        frequency = self.analyze_frequency(lottery_type, game['prefix'], number_range, recent_count, half_life)
+        day_stats = self.analyze_day_tendency(lottery_type, game['prefix'], number_range)
+
+        table = self.data[lottery_type]
+        last_draw_day = table.day(len(table) - 1)
+
+        day_numbers = day_stats[last_draw_day]['numbers'] if last_draw_day in day_stats else []
+        day_counts = Counter(day_numbers)
+
+        weights = {}
+        for i in range(1, number_range + 1):
+            base_weight = frequency.get(i, 0)
+            day_weight = day_counts[i] / len(day_numbers) if day_numbers else 0
+            weights[i] = base_weight * 0.7 + day_weight * 100 * 0.3 + random.uniform(0.1, 0.5)
+
+        sorted_numbers = sorted(weights.items(), key=lambda x: x[1], reverse=True)
+        return [num for num, _ in sorted_numbers[:game['picks']]], weights, frequency
+
+    def predict_loto6(self, recent_count=30, half_life=None):
+        if 'loto6' not in self.data:
+            return None, "データが読み込まれていません"
+
+        prediction, weights, frequency = self._predict_loto('loto6', recent_count, half_life)
+
+        bonus_weights = {k: v for k, v in weights.items() if k not in prediction}
+        bonus = max(bonus_weights.items(), key=lambda x: x[1])[0]
+
+        explanations = [f"数字 {num}: {self._frequency_label(frequency.get(num, 0), recent_count, half_life)}"
+                        for num in prediction]
+        explanations.append(f"ボーナス {bonus}: {self._frequency_label(frequency.get(bonus, 0), recent_count, half_life)}")
+        return (prediction, bonus), "\n".join(explanations)
+
+    def predict_loto7(self, recent_count=30, half_life=None):
+        if 'loto7' not in self.data:
+            return None, "データが読み込まれていません"
+
+        prediction, weights, frequency = self._predict_loto('loto7', recent_count, half_life)
+
+        remaining_numbers = [k for k in weights if k not in prediction]
+        bonus1 = random.choice(remaining_numbers)
+        remaining_numbers.remove(bonus1)
+        bonus2 = random.choice(remaining_numbers)
+
+        explanations = [f"数字 {num}: {self._frequency_label(frequency.get(num, 0), recent_count, half_life)}"
+                        for num in prediction]
+        for i, bonus in enumerate([bonus1, bonus2]):
+            explanations.append(
+                f"ボーナス{i+1} {bonus}: {self._frequency_label(frequency.get(bonus, 0), recent_count, half_life)}"
+            )
+        return (prediction, [bonus1, bonus2]), "\n".join(explanations)
+
+    def predict_numbers3(self, recent_count=30, box_weighting=False, half_life=None):
+        return self._predict_numbers('numbers3', recent_count, box_weighting, half_life)
+
+    def predict_numbers4(self, recent_count=30, box_weighting=False, half_life=None):
+        return self._predict_numbers('numbers4', recent_count, box_weighting, half_life)
+
+    def _digit_rows(self, lottery_type, recent_count=None):
+        digits = NUMBERS_GAMES[lottery_type]['digits']
+        return [str(number).zfill(digits) for number in self.data[lottery_type].tail('number', recent_count)]
+
+    def _predict_numbers(self, lottery_type, recent_count, box_weighting, half_life=None):
+        if lottery_type not in self.data:
+            return None, "データが読み込まれていません"
+
+        digits = NUMBERS_GAMES[lottery_type]['digits']
+        digit_frequency = {i: Counter() for i in range(digits)}
+
+        if half_life is not None:
+            rows = [[int(d) for d in number] for number in self._digit_rows(lottery_type)]
+            for i in range(digits):
+                values = self._decayed_counts([(row[i],) for row in rows], 10, half_life)
+                digit_frequency[i].update({d: v for d, v in enumerate(values) if v > 0})
+        else:
+            for number in self._digit_rows(lottery_type, recent_count):
+                for i, digit in enumerate(number):
+                    digit_frequency[i][int(digit)] += 1
+
+        if box_weighting:
+            prediction = self._choose_box_weighted(lottery_type, digit_frequency)
+            explanations = [
+                f"{i+1}桁目: {digit} ({self._frequency_label(digit_frequency[i][int(digit)], recent_count, half_life)})"
+                for i, digit in enumerate(prediction)
+            ]
+        else:
+            prediction = ""
+            explanations = []
+
+            for i in range(digits):
+                most_common = digit_frequency[i].most_common(3)
+                weights = [freq for _, freq in most_common]
+                if weights:
+                    chosen_digit = random.choices([digit for digit, _ in most_common], weights=weights)[0]
+                    prediction += str(chosen_digit)
+                    explanations.append(f"{i+1}桁目: {chosen_digit} ({self._frequency_label(digit_frequency[i][chosen_digit], recent_count, half_life)})")
+                else:
+                    digit = random.randint(0, 9)
+                    prediction += str(digit)
+                    explanations.append(f"{i+1}桁目: {digit} (ランダム選択)")
+
+        history = self.lookup_number(lottery_type, prediction)
+        if history is not None:
+            explanations.append(
+                f"ストレート: 全{history['total']}回中{history['straight_count']}回出現 / "
+                f"ボックス: {history['box_count']}回出現"
+            )
+
+        return prediction, "\n".join(explanations)
+
+    def _numbers_index(self, lottery_type):
+        # ストレート・ボックス (数字を昇順に並べた文字列) ごとの出現回数と最終出現回
+        if lottery_type not in self.numbers_indexes:
+            straight_counts, box_counts = Counter(), Counter()
+            straight_last, box_last = {}, {}
+            for draw_id, number in enumerate(self._digit_rows(lottery_type)):
+                box = ''.join(sorted(number))
+                straight_counts[number] += 1
+                box_counts[box] += 1
+                straight_last[number] = draw_id
+                box_last[box] = draw_id
+            self.numbers_indexes[lottery_type] = {
+                'straight_counts': straight_counts, 'straight_last': straight_last,
+                'box_counts': box_counts, 'box_last': box_last,
+            }
+        return self.numbers_indexes[lottery_type]
+
+    def _choose_box_weighted(self, lottery_type, digit_frequency):
+        # 桁別の出現率の積に、ボックスの期待値に対する出現比率を掛けた重みで選択
+        digits = NUMBERS_GAMES[lottery_type]['digits']
+        index = self._numbers_index(lottery_type)
+        space = 10 ** digits
+        total = len(self.data[lottery_type])
+
+        rates = []
+        for i in range(digits):
+            counts = [digit_frequency[i][d] + 1 for d in range(10)]
+            rates.append([c / sum(counts) for c in counts])
+
+        scores = {}
+        for number in range(space):
+            text = str(number).zfill(digits)
+            score = 1.0
+            for i, digit in enumerate(text):
+                score *= rates[i][int(digit)]
+            expected = total * box_size(number, digits) / space
+            scores[text] = score * ((index['box_counts'][''.join(sorted(text))] + 1) / (expected + 1))
+
+        candidates = sorted(scores, key=scores.get)[-10:]
+        return random.choices(candidates, weights=[scores[c] for c in candidates])[0]
+
+    def lookup_number(self, lottery_type, number):
+        if lottery_type not in NUMBERS_GAMES or lottery_type not in self.data:
+            return None
+
+        digits = NUMBERS_GAMES[lottery_type]['digits']
+        number = int(number)
+        if number < 0 or number >= 10 ** digits:
+            raise ValueError(f"{lottery_type}の番号は{digits}桁以内で指定してください")
+
+        index = self._numbers_index(lottery_type)
+        text = str(number).zfill(digits)
+        box = ''.join(sorted(text))
+        table = self.data[lottery_type]
+        result = {
+            'straight_count': index['straight_counts'][text],
+            'straight_last': index['straight_last'].get(text, -1),
+            'box_count': index['box_counts'][box],
+            'box_last': index['box_last'].get(box, -1),
+            'box_size': box_size(number, digits),
+            'total': len(table),
+        }
+        for key in ['straight_last', 'box_last']:
+            draw_id = result[key]
+            result[f"{key}_date"] = table.date(draw_id) if 'date' in table.columns and draw_id >= 0 else None
+        return result
@@ -0,0 +1,196 @@
+"""
+scikit-learn による機械学習予測モデル
+抽選ごとの特徴量（直近の出現率・未出現間隔・曜日）を一括で作成し、
+数字（ナンバーズは桁×数字）ごとの分類器を学習・保存する
+"""
+
+import hashlib
+import os
+import tempfile
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import SGDClassifier
+
+from lottery_analyzer import target_presence
+
+FREQUENCY_WINDOWS = (10, 30, 100)
+GAP_CAP = 100
+# 特徴量の計算に必要な過去の抽選数
+LOOKBACK = max(max(FREQUENCY_WINDOWS), GAP_CAP)
+MODEL_CACHE_DIR = os.path.join('data', 'model_cache')
+# ゲームごとに残すデータバージョンの数（古いものから削除）
+MODEL_CACHE_VERSIONS = 3
+
+
+def data_version(df):
+    """データ内容から決まるバージョン文字列"""
+    hashed = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return hashlib.sha1(hashed.tobytes()).hexdigest()[:16]
+
+
+def weekday_codes(df):
+    return df['date'].dt.dayofweek.to_numpy(dtype=np.int64)
+
+
+def next_weekday(df):
+    """直近の抽選間隔から次回抽選の曜日を推定"""
+    dates = df['date'].tail(11)
+    if len(dates) < 2:
+        return int(dates.dt.dayofweek.iloc[-1])
+    step = dates.diff().dropna().mode().iloc[0]
+    return int((dates.iloc[-1] + step).dayofweek)
+
+
+def build_features(presence, weekdays):
+    """各抽選 t について t より前の抽選のみから作る特徴量 (抽選数 × 対象数 × 特徴量数)"""
+    count, size = presence.shape
+    rows = np.arange(count)
+    cumulative = np.vstack([np.zeros((1, size), dtype=np.int64), np.cumsum(presence, axis=0)])
+
+    features = []
+    for window in FREQUENCY_WINDOWS:
+        start = np.maximum(rows - window, 0)
+        features.append((cumulative[rows] - cumulative[start]) / window)
+
+    # 前回出現からの間隔（未出現は GAP_CAP 扱い）
+    seen = np.where(presence, rows[:, np.newaxis], -1)
+    last_seen = np.maximum.accumulate(seen, axis=0)
+    last_before = np.vstack([np.full((1, size), -1), last_seen[:-1]])
+    gap = np.where(last_before >= 0, rows[:, np.newaxis] - last_before, GAP_CAP)
+    features.append(np.minimum(gap, GAP_CAP) / GAP_CAP)
+
+    weekday_onehot = np.eye(7)[weekdays]
+    features.extend(np.broadcast_to(weekday_onehot[:, day:day + 1], (count, size)) for day in range(7))
+
+    return np.stack(features, axis=2).astype(np.float32)
+
+
+def build_next_features(presence, weekday):
+    """最新の抽選の次の回の特徴量 (対象数 × 特徴量数)"""
+    size = presence.shape[1]
+    features = [presence[-window:].sum(axis=0) / window for window in FREQUENCY_WINDOWS]
+
+    recent_first = presence[::-1]
+    gap = np.where(recent_first.any(axis=0), recent_first.argmax(axis=0) + 1, GAP_CAP)
+    features.append(np.minimum(gap, GAP_CAP) / GAP_CAP)
+
+    features.extend(np.full(size, float(day == weekday)) for day in range(7))
+    return np.stack(features, axis=1).astype(np.float32)
+
+
+class MLPredictor:
+    def __init__(self, lottery_type, cache_dir=MODEL_CACHE_DIR):
+        self.lottery_type = lottery_type
+        self.cache_dir = cache_dir
+        self.version = None
+        self.features = None
+        self.models = []
+
+    def _paths(self, version):
+        base = os.path.join(self.cache_dir, f"{self.lottery_type}_{version}")
+        return f"{base}_features.npy", f"{base}_models.joblib"
+
+    def _load(self, version):
+        features_path, models_path = self._paths(version)
+        if not (os.path.exists(features_path) and os.path.exists(models_path)):
+            return False
+        try:
+            features = np.load(features_path)
+            models = joblib.load(models_path)
+            # 最近使ったバージョンとして残す
+            os.utime(models_path)
+        except FileNotFoundError:
+            # 他の予測器が古いバージョンとして削除した
+            return False
+        self.features = features
+        self.models = models
+        self.version = version
+        return True
+
+    def _save(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        features_path, models_path = self._paths(self.version)
+        # 書きかけのファイルを読まれないよう、一時ファイルに書いてから置き換える
+        self._write_atomic(features_path, lambda file: np.save(file, self.features))
+        self._write_atomic(models_path, lambda file: joblib.dump(self.models, file))
+        self._prune()
+
+    def _write_atomic(self, path, write):
+        descriptor, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                write(file)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    def _prune(self):
+        """最近使った MODEL_CACHE_VERSIONS 個を残し、古いバージョンのファイルを削除"""
+        prefix, suffix = f"{self.lottery_type}_", "_models.joblib"
+        used = {}
+        for name in os.listdir(self.cache_dir):
+            version = name[len(prefix):-len(suffix)]
+            if name.startswith(prefix) and name.endswith(suffix) and '_' not in version:
+                used[version] = os.path.getmtime(os.path.join(self.cache_dir, name))
+
+        stale = sorted(used, key=used.get, reverse=True)[MODEL_CACHE_VERSIONS:]
+        for version in stale:
+            if version == self.version:
+                continue
+            for path in self._paths(version):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def fit(self, df):
+        """保存済みモデルがあれば読み込み、なければ学習して保存"""
+        version = data_version(df)
+        if self._load(version):
+            return self
+
+        presence = target_presence(self.lottery_type, df)
+        self.features = build_features(presence, weekday_codes(df))
+        self.models = []
+        for target in range(presence.shape[1]):
+            model = SGDClassifier(loss='log_loss', alpha=1e-3, random_state=0)
+            labels = presence[:, target]
+            if labels.all() or not labels.any():
+                # 一度も（または毎回）出現していない対象は fit できないため、両クラスを指定して学習
+                model.partial_fit(self.features[:, target, :], labels, classes=[False, True])
+            else:
+                model.fit(self.features[:, target, :], labels)
+            self.models.append(model)
+
+        self.version = version
+        self._save()
+        return self
+
+    def update(self, df, new_count):
+        """末尾 new_count 回分の新しい抽選で追加学習"""
+        version = data_version(df)
+        if self._load(version):
+            return self
+
+        recent = df.tail(new_count + LOOKBACK)
+        presence = target_presence(self.lottery_type, recent)
+        new_features = build_features(presence, weekday_codes(recent))[-new_count:]
+        for target, model in enumerate(self.models):
+            model.partial_fit(new_features[:, target, :], presence[-new_count:, target])
+
+        self.features = np.concatenate([self.features, new_features])
+        self.version = version
+        self._save()
+        return self
+
+    def predict_proba(self, df):
+        """次回抽選での各対象の出現確率"""
+        presence = target_presence(self.lottery_type, df.tail(LOOKBACK))
+        next_features = build_next_features(presence, next_weekday(df))
+        return np.array([
+            model.predict_proba(next_features[target:target + 1])[0, 1]
+            for target, model in enumerate(self.models)
+        ])
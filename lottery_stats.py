@@ -0,0 +1,125 @@
+"""
+出現頻度・曜日傾向の統計的検定
+数字（ナンバーズは桁×数字）ごとの二項検定と、全体のカイ二乗検定を
+複数の集計期間についてまとめて計算し、多重比較の補正を行う
+"""
+
+import numpy as np
+from scipy import stats
+
+from lottery_analyzer import LOTO_GAMES, NUMBERS_GAMES, WEEKDAYS
+
+DEFAULT_WINDOWS = tuple(range(10, 101))
+SIGNIFICANCE_LEVEL = 0.05
+
+
+def target_layout(lottery_type):
+    """検定対象のラベル・グループ（カイ二乗検定の単位）・1回あたりの出現確率"""
+    if lottery_type in NUMBERS_GAMES:
+        digits = NUMBERS_GAMES[lottery_type]['digits']
+        labels = [f"{position + 1}桁目:{digit}" for position in range(digits) for digit in range(10)]
+        groups = np.repeat(np.arange(digits), 10)
+        return labels, groups, np.full(digits * 10, 0.1)
+
+    game = LOTO_GAMES[lottery_type]
+    labels = [f"数字 {number}" for number in range(1, game['number_range'] + 1)]
+    groups = np.zeros(game['number_range'], dtype=np.int64)
+    return labels, groups, np.full(game['number_range'], game['picks'] / game['number_range'])
+
+
+def binomial_p_values(observed, trials, probability):
+    """両側二項検定の p 値（片側 p 値の2倍、上限1）"""
+    lower = stats.binom.cdf(observed, trials, probability)
+    upper = stats.binom.sf(observed - 1, trials, probability)
+    return np.minimum(1.0, 2 * np.minimum(lower, upper))
+
+
+def benjamini_hochberg(p_values):
+    """Benjamini-Hochberg 法で補正した p 値（入力と同じ形）"""
+    flat = np.asarray(p_values, dtype=float).ravel()
+    if flat.size == 0:
+        return flat.reshape(np.shape(p_values))
+    order = np.argsort(flat)
+    ranked = flat[order] * flat.size / np.arange(1, flat.size + 1)
+    adjusted = np.minimum.accumulate(ranked[::-1])[::-1]
+    result = np.empty_like(flat)
+    result[order] = np.minimum(adjusted, 1.0)
+    return result.reshape(np.shape(p_values))
+
+
+def chi_square_by_group(observed, expected, groups):
+    """グループごとの適合度カイ二乗検定 (..., グループ数)"""
+    group_ids = np.unique(groups)
+    contributions = (observed - expected) ** 2 / np.where(expected > 0, expected, 1)
+    statistic = np.stack([contributions[..., groups == g].sum(axis=-1) for g in group_ids], axis=-1)
+    dof = np.array([(groups == g).sum() - 1 for g in group_ids])
+    return statistic, stats.chi2.sf(statistic, dof)
+
+
+def frequency_significance(targets, lottery_type, windows=DEFAULT_WINDOWS):
+    """直近 w 回 (w は windows の各値) の出現回数の偏りを一括で検定
+
+    targets は抽選ごとの出現対象の番号 (抽選数 × 1回の出現数)
+    """
+    labels, groups, probability = target_layout(lottery_type)
+    windows = np.array(sorted(w for w in set(windows) if 0 < w <= len(targets)), dtype=np.int64)
+
+    # 最長の期間分だけ新しい順に出現有無を並べて累積する
+    longest = windows.max() if len(windows) else 0
+    recent = targets[len(targets) - longest:][::-1]
+    presence = np.zeros((longest, len(labels)), dtype=np.int64)
+    presence[np.arange(longest)[:, np.newaxis], recent] = 1
+    observed = np.cumsum(presence, axis=0)[windows - 1]
+
+    trials = windows[:, np.newaxis]
+    expected = trials * probability
+
+    p_values = binomial_p_values(observed, trials, probability)
+    adjusted = benjamini_hochberg(p_values)
+    chi2, chi2_p = chi_square_by_group(observed, expected, groups)
+    chi2_adjusted = benjamini_hochberg(chi2_p)
+    return {
+        'labels': labels,
+        'windows': windows.tolist(),
+        'counts': observed,
+        'expected': expected,
+        'p_values': p_values,
+        'adjusted': adjusted,
+        'significant': adjusted < SIGNIFICANCE_LEVEL,
+        'chi2': chi2,
+        'chi2_p': chi2_p,
+        'chi2_adjusted': chi2_adjusted,
+        'chi2_significant': chi2_adjusted < SIGNIFICANCE_LEVEL,
+    }
+
+
+def weekday_significance(targets, weekdays, lottery_type):
+    """曜日ごとの出現回数の偏りを検定（抽選のない曜日は除外）"""
+    labels, groups, probability = target_layout(lottery_type)
+    size = len(labels)
+    draws = np.bincount(weekdays, minlength=7)
+    counts = np.bincount((weekdays[:, np.newaxis] * size + targets).ravel(), minlength=7 * size).reshape(7, size)
+
+    days = np.flatnonzero(draws)
+    observed = counts[days]
+    trials = draws[days][:, np.newaxis]
+    expected = trials * probability
+
+    p_values = binomial_p_values(observed, trials, probability)
+    adjusted = benjamini_hochberg(p_values)
+    chi2, chi2_p = chi_square_by_group(observed, expected, groups)
+    chi2_adjusted = benjamini_hochberg(chi2_p)
+    return {
+        'labels': labels,
+        'days': [WEEKDAYS[day] for day in days],
+        'draws': draws[days].tolist(),
+        'counts': observed,
+        'expected': expected,
+        'p_values': p_values,
+        'adjusted': adjusted,
+        'significant': adjusted < SIGNIFICANCE_LEVEL,
+        'chi2': chi2,
+        'chi2_p': chi2_p,
+        'chi2_adjusted': chi2_adjusted,
+        'chi2_significant': chi2_adjusted < SIGNIFICANCE_LEVEL,
+    }
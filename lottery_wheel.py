@@ -0,0 +1,133 @@
+"""
+ホイール（カバー）買い目の生成
+候補数字のプールから、全ての k 個組（ペア・トリプル等）が少なくとも1枚の買い目に
+含まれるような、なるべく少ない買い目の組を探索する
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from math import comb
+
+import numpy as np
+
+_POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+# 改善のない局所探索がこの回数続いたら打ち切る
+STALL_ROUNDS = 300
+
+
+def _popcount_rows(masks):
+    """各行のビット数の合計"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(masks).sum(axis=-1, dtype=np.int64)
+    counts = _POPCOUNT_TABLE[np.ascontiguousarray(masks).view(np.uint8)]
+    return counts.sum(axis=-1, dtype=np.int64)
+
+
+def build_coverage(pool_size, ticket_size, cover):
+    """全ての候補買い目と、それぞれがカバーする k 個組の番号・ビット集合"""
+    candidates = np.array(list(combinations(range(pool_size), ticket_size)), dtype=np.int64)
+
+    # k 個組 (昇順) -> 通し番号
+    place_values = pool_size ** np.arange(cover - 1, -1, -1)
+    subset_codes = np.array(list(combinations(range(pool_size), cover)), dtype=np.int64) @ place_values
+    subset_index = np.full(pool_size ** cover, -1, dtype=np.int64)
+    subset_index[subset_codes] = np.arange(len(subset_codes))
+
+    positions = np.array(list(combinations(range(ticket_size), cover)), dtype=np.int64)
+    ticket_subsets = subset_index[candidates[:, positions] @ place_values]
+
+    words = (len(subset_codes) + 63) // 64
+    masks = np.zeros((len(candidates), words), dtype=np.uint64)
+    rows = np.repeat(np.arange(len(candidates)), ticket_subsets.shape[1])
+    flat = ticket_subsets.ravel()
+    np.bitwise_or.at(masks, (rows, flat // 64), np.left_shift(np.uint64(1), (flat % 64).astype(np.uint64)))
+    return candidates, ticket_subsets, masks, len(subset_codes)
+
+
+def schonheim_bound(pool_size, ticket_size, cover):
+    """必要な買い目数の下限（Schönheim 限界）"""
+    bound = 1
+    for i in range(cover - 1, -1, -1):
+        bound = -(-(pool_size - i) * bound // (ticket_size - i))
+    return bound
+
+
+def _full_mask(subset_count, words):
+    mask = np.full(words, np.iinfo(np.uint64).max, dtype=np.uint64)
+    if subset_count % 64:
+        mask[-1] = np.uint64((1 << (subset_count % 64)) - 1)
+    return mask
+
+
+def _greedy_cover(masks, ticket_subsets, subset_count, rng, initial=()):
+    """未カバーの組を最も多く含む買い目を順に選び、最後に冗長な買い目を取り除く"""
+    uncovered = _full_mask(subset_count, masks.shape[1])
+    chosen = list(initial)
+    for pick in chosen:
+        uncovered &= ~masks[pick]
+    while uncovered.any():
+        gains = _popcount_rows(masks & uncovered)
+        best = np.flatnonzero(gains == gains.max())
+        pick = int(rng.choice(best))
+        chosen.append(pick)
+        uncovered &= ~masks[pick]
+
+    cover_counts = np.bincount(ticket_subsets[chosen].ravel(), minlength=subset_count)
+    for pick in rng.permutation(chosen):
+        if (cover_counts[ticket_subsets[pick]] > 1).all():
+            cover_counts[ticket_subsets[pick]] -= 1
+            chosen.remove(pick)
+    return chosen
+
+
+def _search(pool_size, ticket_size, cover, time_budget, seed, stall_rounds=STALL_ROUNDS):
+    """時間内で局所探索（一部の買い目を外して貪欲法で補う）を繰り返し、最小の買い目集合を返す
+
+    下限に達した場合と、stall_rounds 回続けて改善しなかった場合は時間内でも打ち切る
+    """
+    deadline = time.monotonic() + time_budget
+    candidates, ticket_subsets, masks, subset_count = build_coverage(pool_size, ticket_size, cover)
+    rng = np.random.default_rng(seed)
+    lower_bound = schonheim_bound(pool_size, ticket_size, cover)
+
+    best = _greedy_cover(masks, ticket_subsets, subset_count, rng)
+    current = best
+    stalled = 0
+    while time.monotonic() < deadline and len(best) > lower_bound and stalled < stall_rounds:
+        removed = max(3, len(current) // 3)
+        kept = [int(pick) for pick in rng.permutation(current)[removed:]]
+        chosen = _greedy_cover(masks, ticket_subsets, subset_count, rng, kept)
+        if len(chosen) <= len(current):
+            current = chosen
+        if len(current) < len(best):
+            best = current
+            stalled = 0
+        else:
+            stalled += 1
+    return candidates[best].tolist()
+
+
+def generate_wheel(pool, ticket_size, cover=2, time_budget=5.0, workers=1, seed=None):
+    """pool の全ての cover 個組を含む買い目の一覧を返す"""
+    pool = sorted(set(int(n) for n in pool))
+    if ticket_size > len(pool):
+        raise ValueError("候補数字の数は1枚の数字の個数以上にしてください")
+    if not 1 <= cover <= ticket_size:
+        raise ValueError("カバーする組の大きさは1〜1枚の数字の個数で指定してください")
+    if comb(len(pool), ticket_size) * comb(len(pool), cover) > 2 ** 33:
+        raise ValueError("候補数字が多すぎます")
+
+    workers = workers or os.cpu_count() or 1
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    args = (len(pool), ticket_size, cover, time_budget)
+    if workers == 1:
+        results = [_search(*args, seeds[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_search, *zip(*[args + (s,) for s in seeds])))
+
+    best = min(results, key=len)
+    return sorted([pool[i] for i in ticket] for ticket in best)
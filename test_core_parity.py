@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Parity tests: the pandas-free CoreLotteryAnalyzer must match LotteryAnalyzer
+"""
+
+import random
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from lottery_analyzer import LotteryAnalyzer
+from lottery_core import CoreLotteryAnalyzer
+
+LOTO = [('loto6', 'loto6_', 43), ('loto7', 'loto7_', 37)]
+NUMBERS = ['numbers3', 'numbers4']
+SAMPLES = ['sample', 'large_sample']
+
+
+def load_both(lottery_type, sample, **options):
+    path = f"data/{lottery_type}_{sample}.csv"
+    analyzer, core = LotteryAnalyzer(), CoreLotteryAnalyzer()
+    assert analyzer.load_data(lottery_type, path, **options) == core.load_data(lottery_type, path, **options)
+    return analyzer, core
+
+
+def heaviest(candidates, weights):
+    """The candidate with the highest normalized weight (the last one on ties)"""
+    total = sum(weights)
+    probabilities = [w / total for w in weights]
+    return list(candidates)[len(probabilities) - 1 - probabilities[::-1].index(max(probabilities))]
+
+
+def pick_heaviest(monkeypatch):
+    """Replace the random digit choice of both engines with 'highest weight wins'"""
+    monkeypatch.setattr(np.random, 'choice', lambda a, p: heaviest(a, list(p)))
+    monkeypatch.setattr(random, 'choices', lambda a, weights: [heaviest(a, weights)])
+
+
+@pytest.mark.parametrize('sample', SAMPLES)
+@pytest.mark.parametrize('lottery_type,prefix,number_range', LOTO)
+def test_loto_frequency(lottery_type, prefix, number_range, sample):
+    analyzer, core = load_both(lottery_type, sample)
+    for recent_count in [1, 10, 30, 100, 10000]:
+        assert (analyzer.analyze_frequency(lottery_type, prefix, number_range, recent_count)
+                == core.analyze_frequency(lottery_type, prefix, number_range, recent_count))
+
+    decayed = analyzer.analyze_frequency(lottery_type, prefix, number_range, half_life=20)
+    assert core.analyze_frequency(lottery_type, prefix, number_range, half_life=20) == pytest.approx(decayed)
+
+    assert (analyzer.analyze_day_tendency(lottery_type, prefix, number_range)
+            == core.analyze_day_tendency(lottery_type, prefix, number_range))
+
+
+@pytest.mark.parametrize('sample', SAMPLES)
+@pytest.mark.parametrize('lottery_type,prefix,number_range', LOTO)
+def test_loto_prediction(lottery_type, prefix, number_range, sample):
+    analyzer, core = load_both(lottery_type, sample)
+    predict = f"predict_{lottery_type}"
+    for recent_count, half_life in [(30, None), (10, None), (30, 15)]:
+        random.seed(recent_count)
+        expected = getattr(analyzer, predict)(recent_count, half_life=half_life)
+        random.seed(recent_count)
+        assert getattr(core, predict)(recent_count, half_life=half_life) == expected
+
+
+@pytest.mark.parametrize('sample', SAMPLES)
+@pytest.mark.parametrize('lottery_type', NUMBERS)
+def test_numbers_prediction(lottery_type, sample, monkeypatch):
+    analyzer, core = load_both(lottery_type, sample)
+    pick_heaviest(monkeypatch)
+    predict = f"predict_{lottery_type}"
+    for options in [{}, {'recent_count': 10}, {'half_life': 10}, {'box_weighting': True}]:
+        assert getattr(core, predict)(**options) == getattr(analyzer, predict)(**options)
+
+
+@pytest.mark.parametrize('lottery_type', NUMBERS)
+def test_numbers_lookup(lottery_type):
+    analyzer, core = load_both(lottery_type, 'large_sample')
+    for draw_id in [0, 7, 123, len(core.data[lottery_type]) - 1]:
+        number = int(core.data[lottery_type].columns['number'][draw_id])
+        expected = analyzer.lookup_number(lottery_type, number)
+        for key in ['straight_last_date', 'box_last_date']:
+            expected[key] = expected[key].date() if expected[key] is not None else None
+        assert core.lookup_number(lottery_type, number) == expected
+
+    with pytest.raises(ValueError):
+        core.lookup_number(lottery_type, 10 ** 5)
+
+
+@pytest.mark.parametrize('options', [
+    {'recent_count': 50},
+    {'start_date': '2010-01-01'},
+    {'start_date': '2005-01-01', 'end_date': '2006-12-31'},
+    {'columns': ['date', 'day'] + [f'loto6_{i}' for i in range(1, 7)]},
+])
+def test_load_options(options):
+    analyzer, core = load_both('loto6', 'large_sample', **options)
+    df = analyzer.data['loto6']
+    table = core.data['loto6']
+    assert list(df.columns) == list(table.columns)
+    assert [d.date() for d in df['date']] == [table.date(i) for i in range(len(table))]
+    assert df['loto6_1'].tolist() == table.columns['loto6_1'].tolist()
+    assert analyzer.analyze_frequency('loto6', 'loto6_', 43) == core.analyze_frequency('loto6', 'loto6_', 43)
+
+
+def test_missing_data():
+    core = CoreLotteryAnalyzer()
+    assert core.analyze_frequency('loto6', 'loto6_', 43) == {}
+    assert core.predict_loto6() == LotteryAnalyzer().predict_loto6()
+    assert core.predict_numbers3() == LotteryAnalyzer().predict_numbers3()
+
+
+def test_import_is_lightweight():
+    code = "import sys, lottery_core; print('pandas' in sys.modules, 'numpy' in sys.modules)"
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    assert result.stdout.split() == ['False', 'False']
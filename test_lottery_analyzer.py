@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Tests for LotteryAnalyzer data handling
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from lottery_analyzer import (LotteryAnalyzer, TransitionModel, validate_draws, quarantine_draws, read_draws,
+                              write_draws)
+
+LOTO6_ROWS = [
+    # date, day, loto6_1..6, bonus
+    ['2024-06-20', 'Thursday', 3, 12, 18, 21, 30, 43, 16],   # 0: valid
+    ['2024-13-40', 'Thursday', 1, 2, 3, 4, 5, 6, 7],         # 1: invalid_date
+    ['2024-06-24', 'Thursday', 1, 2, 3, 4, 5, 6, 7],         # 2: day_mismatch (Monday)
+    ['2024-06-27', 'Thursday', 1, 2, 3, 4, 5, 44, 7],        # 3: ball_range
+    ['2024-07-01', 'Monday', 1, 2, 3, 4, 5, None, 7],        # 4: ball_range (blank)
+    ['2024-07-04', 'Thursday', 1, 1, 3, 4, 5, 6, 7],         # 5: duplicate_numbers
+    ['2024-07-08', 'Monday', 1, 2, 3, 4, 5, 6, 6],           # 6: bonus_overlap
+    ['2024-07-11', 'Thursday', 7, 8, 9, 10, 11, 12, 13],     # 7: valid
+]
+LOTO6_COLUMNS = ['date', 'day'] + [f'loto6_{i}' for i in range(1, 7)] + ['bonus']
+
+
+def loto6_frame():
+    return pd.DataFrame(LOTO6_ROWS, columns=LOTO6_COLUMNS)
+
+
+def test_validate_loto_checks():
+    report = validate_draws('loto6', loto6_frame())
+    errors = {check: rows.tolist() for check, rows in report['errors'].items()}
+    assert errors == {
+        'invalid_date': [1],
+        'day_mismatch': [2],
+        'ball_range': [3, 4],
+        'duplicate_numbers': [5],
+        'bonus_overlap': [6],
+    }
+    assert report['rows'] == 8
+    assert report['invalid_rows'].tolist() == [1, 2, 3, 4, 5, 6]
+
+
+def test_validate_loto7_bonus_duplicates():
+    df = pd.DataFrame(
+        [['2024-06-21', 'Friday', 1, 2, 3, 4, 5, 6, 7, 8, 8]],
+        columns=['date', 'day'] + [f'loto7_{i}' for i in range(1, 8)] + ['bonus1', 'bonus2'],
+    )
+    report = validate_draws('loto7', df)
+    assert report['errors']['bonus_overlap'].tolist() == [0]
+
+
+def test_validate_numbers_range():
+    df = pd.DataFrame({
+        'date': ['2024-06-17', '2024-06-18', '2024-06-19', '2024-06-20'],
+        'day': ['Monday', 'Tuesday', 'Wednesday', 'Thursday'],
+        'number': ['582', '1000', '-1', 'abc'],
+    })
+    report = validate_draws('numbers3', df)
+    assert report['errors']['number_range'].tolist() == [1, 2, 3]
+    assert report['invalid_rows'].tolist() == [1, 2, 3]
+
+
+def test_quarantine_draws():
+    df = loto6_frame()
+    clean, removed = quarantine_draws(df, validate_draws('loto6', df))
+    assert clean['loto6_1'].tolist() == [3, 7]
+    assert clean.index.tolist() == [0, 1]
+    assert removed.index.tolist() == [1, 2, 3, 4, 5, 6]
+
+
+def test_load_data_quarantine(tmp_path):
+    path = tmp_path / 'loto6.csv'
+    loto6_frame().to_csv(path, index=False)
+
+    analyzer = LotteryAnalyzer()
+    assert analyzer.load_data('loto6', path, quarantine=True) == 2
+    df = analyzer.data['loto6']
+    assert df['date'].dt.strftime('%Y-%m-%d').tolist() == ['2024-06-20', '2024-07-11']
+    # 空欄のあった列も不正な行を除けば uint8 になる
+    assert all(df[col].dtype == np.uint8 for col in LOTO6_COLUMNS[2:])
+    assert len(analyzer.quarantined['loto6']) == 6
+    assert analyzer.find_draws('loto6', [7, 8]).tolist() == [1]
+
+
+def test_load_frame_quarantine_keeps_raw_values():
+    analyzer = LotteryAnalyzer()
+    assert analyzer.load_frame('loto6', loto6_frame(), quarantine=True) == 2
+    assert analyzer.quarantined['loto6']['date'].tolist()[0] == '2024-13-40'
+
+
+def loaded_base():
+    base = LotteryAnalyzer()
+    counts, errors = base.load_many({
+        'loto6': 'data/loto6_large_sample.csv',
+        'numbers3': 'data/numbers3_large_sample.csv',
+    })
+    assert not errors
+    return base
+
+
+def test_overlay_leaves_base_unchanged():
+    base = loaded_base()
+    data = {lottery_type: df.copy() for lottery_type, df in base.data.items()}
+    number_index = base.number_indexes['loto6']
+    postings = {number: p.copy() for number, p in number_index.postings.items()}
+    numbers_index = base.numbers_indexes['numbers3']
+    straight_counts = numbers_index.straight_counts.copy()
+    bitmasks = {name: masks.copy() for name, masks in base.get_bitmasks('loto6').items()}
+
+    overlay = base.overlay()
+    new_draw = data['loto6'].tail(1).assign(date=data['loto6']['date'].iloc[-1] + pd.Timedelta(days=7))
+    overlay.append_draws('loto6', new_draw.astype({'day': object}).to_dict('records'))
+    overlay.load_frame('numbers3', pd.read_csv('data/numbers3_sample.csv'))
+
+    assert len(overlay.data['loto6']) == len(data['loto6']) + 1
+    assert len(overlay.data['numbers3']) == 10
+    assert overlay.find_draws('loto6', new_draw.iloc[0, 2:8].tolist())[-1] == len(data['loto6'])
+
+    for lottery_type, df in data.items():
+        pd.testing.assert_frame_equal(base.data[lottery_type], df)
+    assert base.number_indexes['loto6'] is number_index
+    assert all((number_index.postings[number] == p).all() for number, p in postings.items())
+    assert number_index.size == len(data['loto6'])
+    assert base.numbers_indexes['numbers3'] is numbers_index
+    assert (numbers_index.straight_counts == straight_counts).all()
+    for name, masks in base.get_bitmasks('loto6').items():
+        assert (masks == bitmasks[name]).all()
+    assert 'loto6' not in overlay.shared_types and 'numbers3' not in overlay.shared_types
+
+
+def test_shared_cache_built_once():
+    from concurrent.futures import ThreadPoolExecutor
+
+    base = loaded_base()
+    overlays = [base.overlay() for _ in range(8)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        models = list(executor.map(lambda overlay: overlay.get_transition_model('loto6'), overlays))
+        curves = list(executor.map(
+            lambda overlay: overlay.get_frequency_curves('loto6', 'loto6_', 43), overlays
+        ))
+    assert all(model is models[0] for model in models)
+    assert all(curve is curves[0] for curve in curves)
+    assert base.transition_models['loto6'] is models[0]
+
+
+def reference_tier(lottery_type, ticket, main, bonus):
+    matches = len(set(ticket) & set(main))
+    bonus_hit = bool(set(ticket) & set(bonus))
+    if lottery_type == 'loto6':
+        rules = {6: 1, 5: 3 - bonus_hit, 4: 4, 3: 5}
+    else:
+        rules = {7: 1, 6: 3 - bonus_hit, 5: 4, 4: 5, 3: 6 if bonus_hit else 0}
+    return rules.get(matches, 0)
+
+
+def test_check_tickets_prize_tiers():
+    for lottery_type, number_range, picks, bonus_columns in [
+        ('loto6', 43, 6, ['bonus']),
+        ('loto7', 37, 7, ['bonus1', 'bonus2']),
+    ]:
+        analyzer = LotteryAnalyzer()
+        analyzer.load_data(lottery_type, f'data/{lottery_type}_large_sample.csv', recent_count=40)
+        df = analyzer.data[lottery_type]
+        mains = df[[f'{lottery_type}_{i}' for i in range(1, picks + 1)]].to_numpy().tolist()
+        bonuses = df[bonus_columns].to_numpy().tolist()
+
+        # 各等級に当たるチケット（本数字の一部をボーナスや外れ数字に入れ替える）と、ランダムなチケット
+        rng = np.random.default_rng(0)
+        tickets = []
+        for main, bonus in zip(mains, bonuses):
+            others = [n for n in range(1, number_range + 1) if n not in main and n not in bonus]
+            for keep in range(picks - 4, picks + 1):
+                tickets.append(main[:keep] + others[:picks - keep])
+                tickets.append(main[:keep] + bonus[:1] + others[:picks - keep - 1])
+        tickets += [sorted(rng.choice(np.arange(1, number_range + 1), picks, replace=False)) for _ in range(1100)]
+        tickets = [ticket[:picks] for ticket in tickets if len(set(ticket[:picks])) == picks]
+
+        result = analyzer.check_tickets(lottery_type, tickets)
+        expected = np.array([
+            [reference_tier(lottery_type, ticket, main, bonus) for main, bonus in zip(mains, bonuses)]
+            for ticket in tickets
+        ])
+        assert (result['tiers'] == expected).all()
+        assert set(np.unique(expected)) == set(range(0, 6 if lottery_type == 'loto6' else 7))
+
+        tier_counts = analyzer.check_tickets(lottery_type, tickets, summary=True)['tier_counts']
+        for tier in range(1, tier_counts.shape[1] + 1):
+            assert (tier_counts[:, tier - 1] == (expected == tier).sum(axis=1)).all()
+
+
+def test_memory_report_includes_significance():
+    analyzer = LotteryAnalyzer()
+    analyzer.load_data('loto6', 'data/loto6_large_sample.csv')
+    assert analyzer.memory_report()['loto6']['indexes']['significance_results'] == 0
+    analyzer.analyze_significance('loto6')
+    assert analyzer.memory_report()['loto6']['indexes']['significance_results'] > 0
+
+
+def test_find_draws_at_least():
+    analyzer = LotteryAnalyzer()
+    analyzer.load_data('loto6', 'data/loto6_large_sample.csv')
+    main = analyzer.data['loto6'][[f'loto6_{i}' for i in range(1, 7)]].to_numpy()
+    for numbers in [[1, 2], [5, 17, 23, 40], [3, 12, 18, 21, 30, 43]]:
+        hits = np.isin(main, numbers).sum(axis=1)
+        for min_matches in range(0, len(numbers) + 1):
+            expected = np.flatnonzero(hits >= min_matches)
+            assert analyzer.find_draws('loto6', numbers, min_matches).tolist() == expected.tolist()
+        assert len(analyzer.find_draws('loto6', numbers, len(numbers) + 1)) == 0
+
+
+def test_load_without_index(tmp_path):
+    # 欠損のある列や本数字の一部だけの読み込みでも、インデックスを作らずに読み込める
+    path = tmp_path / 'loto6.csv'
+    loto6_frame().iloc[[0, 4, 7]].to_csv(path, index=False)
+    analyzer = LotteryAnalyzer()
+    assert analyzer.load_data('loto6', path) == 3
+    assert analyzer.find_draws('loto6', [1]) is None
+    assert analyzer.check_tickets('loto6', [[1, 2, 3, 4, 5, 6]]) is None
+
+    assert analyzer.load_data('loto6', 'data/loto6_large_sample.csv', columns=['date', 'loto6_1']) > 0
+    assert analyzer.find_draws('loto6', [1]) is None
+    analyzer.append_draws('loto6', [{'date': '2100-01-04', 'loto6_1': 1}])
+    assert analyzer.find_draws('loto6', [1]) is None
+
+
+def test_check_tickets_rejects_invalid():
+    analyzer = LotteryAnalyzer()
+    analyzer.load_data('loto6', 'data/loto6_sample.csv')
+    for tickets in [
+        [[1, 1, 1, 1, 1, 1]],
+        [[1, 2, 3, 4, 5, 6], [7, 8, 9, 10, 11, 7]],
+        [[1.5, 2, 3, 4, 5, 6]],
+        [['1', '2', '3', '4', '5', '6']],
+        [[0, 2, 3, 4, 5, 6]],
+        [[1, 2, 3, 4, 5]],
+    ]:
+        with pytest.raises(ValueError):
+            analyzer.check_tickets('loto6', tickets)
+    assert analyzer.check_tickets('loto6', [[1.0, 2, 3, 4, 5, 6]])['tiers'].shape == (1, 10)
+
+
+def test_load_many_errors_per_game(tmp_path):
+    path = tmp_path / 'loto6.csv'
+    loto6_frame().to_csv(path, index=False)
+
+    analyzer = LotteryAnalyzer()
+    counts, errors = analyzer.load_many({
+        'loto6': {'csv_path': path, 'quarantine': True},
+        'loto7': 'data/missing.csv',
+        'numbers3': {'csv_path': 'data/numbers3_sample.csv', 'recent': 5},
+        'numbers4': {'csv_path': 'data/numbers4_sample.csv', 'recent_count': 5},
+    })
+    assert counts == {'loto6': 2, 'numbers4': 5}
+    assert errors['loto7'] == "ファイルが見つかりません: data/missing.csv"
+    assert errors['numbers3'].startswith("TypeError:")
+    assert len(analyzer.quarantined['loto6']) == 6
+    assert analyzer.find_draws('loto6', [7, 8]).tolist() == [1]
+    assert set(analyzer.data) == {'loto6', 'numbers4'}
+
+    # 検査しない場合は不正な日付でそのゲームだけ失敗する
+    counts, errors = LotteryAnalyzer().load_many({'loto6': path, 'numbers4': 'data/numbers4_sample.csv'})
+    assert list(counts) == ['numbers4'] and list(errors) == ['loto6']
+
+
+def columnar_copies(tmp_path, lottery_type, row_group_size):
+    # CSV と同じ内容の Parquet / Arrow ファイル（日付は日付型で保存）
+    df = pd.read_csv(f'data/{lottery_type}_large_sample.csv')
+    df['date'] = pd.to_datetime(df['date'])
+    paths = []
+    for ext in ['parquet', 'arrow']:
+        path = tmp_path / f'{lottery_type}.{ext}'
+        write_draws(df, path, row_group_size=row_group_size)
+        paths.append(path)
+    return paths
+
+
+@pytest.mark.parametrize('options', [
+    {},
+    {'columns': ['date', 'loto6_1', 'bonus']},
+    {'columns': ['loto6_2'], 'start_date': '2003-01-01', 'end_date': '2004-06-30'},
+    {'columns': ['loto6_3'], 'start_date': '2100-01-01'},
+    {'start_date': '2002-05-01'},
+    {'recent_count': 20},
+    {'recent_count': 45, 'end_date': '2003-12-31'},
+    {'recent_count': 1000},
+])
+def test_read_columnar_matches_csv(tmp_path, options):
+    pytest.importorskip('pyarrow')
+    expected = read_draws('data/loto6_large_sample.csv', **options)
+    if 'columns' in options:
+        assert list(expected.columns) == options['columns']
+    for path in columnar_copies(tmp_path, 'loto6', row_group_size=16):
+        pd.testing.assert_frame_equal(read_draws(path, **options), expected, check_dtype=False)
+
+
+def test_columnar_round_trip(tmp_path):
+    pytest.importorskip('pyarrow')
+    analyzer = LotteryAnalyzer()
+    analyzer.load_data('numbers3', 'data/numbers3_large_sample.csv')
+    for ext in ['parquet', 'arrow', 'csv']:
+        path = tmp_path / f'numbers3.{ext}'
+        assert analyzer.save_data('numbers3', path) == 600
+        loaded = LotteryAnalyzer()
+        assert loaded.load_data('numbers3', path) == 600
+        pd.testing.assert_frame_equal(loaded.data['numbers3'], analyzer.data['numbers3'], check_dtype=False)
+        assert loaded.lookup_number('numbers3', 580) == analyzer.lookup_number('numbers3', 580)
+
+
+def test_transition_counts_brute_force():
+    rng = np.random.default_rng(1)
+    loto = np.array([rng.choice(np.arange(1, 11), 3, replace=False) for _ in range(12)])
+    model = TransitionModel(11)
+    model.update(loto[:5])
+    model.update(loto[5:])
+    expected = np.zeros((11, 11), dtype=np.int64)
+    for previous, current in zip(loto[:-1], loto[1:]):
+        for a in previous:
+            for b in current:
+                expected[a, b] += 1
+    assert (model.counts == expected).all()
+    assert model.last.tolist() == loto[-1].tolist()
+
+    digits = rng.integers(0, 10, size=(15, 3))
+    model = TransitionModel(10, positions=3)
+    model.update(digits)
+    expected = np.zeros((3, 10, 10), dtype=np.int64)
+    for previous, current in zip(digits[:-1], digits[1:]):
+        for position in range(3):
+            expected[position, previous[position], current[position]] += 1
+    assert (model.counts == expected).all()
+
+
+@pytest.mark.parametrize('lottery_type', ['loto6', 'numbers4'])
+def test_transition_append_matches_rebuild(lottery_type):
+    full = read_draws(f'data/{lottery_type}_large_sample.csv')
+    analyzer = LotteryAnalyzer()
+    analyzer.load_frame(lottery_type, full.iloc[:-7])
+    model = analyzer.get_transition_model(lottery_type)
+    for new_rows in [full.iloc[-7:-3], full.iloc[-3:]]:
+        analyzer.append_draws(lottery_type, new_rows.astype({'day': object}).to_dict('records'))
+
+    rebuilt = LotteryAnalyzer()
+    rebuilt.load_frame(lottery_type, full)
+    expected = rebuilt.get_transition_model(lottery_type)
+    assert analyzer.get_transition_model(lottery_type) is model
+    assert (model.counts == expected.counts).all()
+    assert (model.last == expected.last).all()
+
+
+@pytest.mark.parametrize('lottery_type,picks,number_range', [('loto6', 6, 43), ('loto7', 7, 37)])
+def test_transition_sample_loto(lottery_type, picks, number_range):
+    analyzer = LotteryAnalyzer()
+    analyzer.load_data(lottery_type, f'data/{lottery_type}_large_sample.csv')
+    np.random.seed(0)
+    tickets = analyzer.get_transition_model(lottery_type).sample(500, picks=picks)
+    assert tickets.shape == (500, picks)
+    assert all(len(set(ticket)) == picks for ticket in tickets.tolist())
+    assert tickets.min() >= 1 and tickets.max() <= number_range
+
+
+@pytest.mark.parametrize('sample', ['sample', 'large_sample'])
+def test_frequency_curves_match_analyze_frequency(sample):
+    analyzer = LotteryAnalyzer()
+    analyzer.load_data('loto7', f'data/loto7_{sample}.csv')
+    curves = analyzer.get_frequency_curves('loto7', 'loto7_', 37)
+    assert len(curves) == min(100, len(analyzer.data['loto7']))
+    for n in [1, 5, 10, 30, 99, 100]:
+        if n <= len(curves):
+            expected = analyzer.analyze_frequency('loto7', 'loto7_', 37, n)
+            assert curves[n - 1].tolist() == [expected[i] for i in range(1, 38)]
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tests for the cached scikit-learn predictor
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('sklearn')
+
+import lottery_ml
+from lottery_analyzer import LotteryAnalyzer, LOTO_GAMES, target_presence
+from lottery_ml import MLPredictor, build_features, data_version, weekday_codes
+
+DATA_DIR = os.path.abspath('data')
+
+
+def load(lottery_type, sample='large_sample'):
+    df = pd.read_csv(os.path.join(DATA_DIR, f'{lottery_type}_{sample}.csv'))
+    df['date'] = pd.to_datetime(df['date'])
+    return df
+
+
+def cached_versions(cache_dir, lottery_type):
+    suffix = '_models.joblib'
+    return {name[len(lottery_type) + 1:-len(suffix)] for name in os.listdir(cache_dir) if name.endswith(suffix)}
+
+
+def test_fit_loads_from_cache(tmp_path, monkeypatch):
+    df = load('numbers3')
+    trained = MLPredictor('numbers3', cache_dir=tmp_path).fit(df)
+    assert cached_versions(tmp_path, 'numbers3') == {data_version(df)}
+
+    # 保存済みのモデルがあれば学習しない
+    def no_training(*args, **kwargs):
+        raise AssertionError("retrained")
+    monkeypatch.setattr(lottery_ml, 'SGDClassifier', no_training)
+    cached = MLPredictor('numbers3', cache_dir=tmp_path).fit(df)
+    assert cached.version == trained.version
+    assert np.array_equal(cached.features, trained.features)
+    assert np.array_equal(cached.predict_proba(df), trained.predict_proba(df))
+
+
+def test_append_draws_updates_model(tmp_path, monkeypatch):
+    full = load('loto6')
+    analyzer = LotteryAnalyzer()
+    analyzer.load_frame('loto6', full.iloc[:-5])
+    monkeypatch.chdir(tmp_path)
+    predictor = analyzer.get_ml_predictor('loto6')
+    coef = [model.coef_.copy() for model in predictor.models]
+
+    new_draws = full.iloc[-5:].astype({'day': object}).to_dict('records')
+    analyzer.append_draws('loto6', new_draws)
+    assert analyzer.get_ml_predictor('loto6') is predictor
+    df = analyzer.data['loto6']
+    assert predictor.version == data_version(df)
+    assert any(not np.array_equal(model.coef_, before) for model, before in zip(predictor.models, coef))
+
+    # 追加分の特徴量は全件から作り直したものと一致する
+    expected = build_features(target_presence('loto6', df), weekday_codes(df))
+    assert np.allclose(predictor.features, expected)
+    assert data_version(df) in cached_versions(tmp_path / lottery_ml.MODEL_CACHE_DIR, 'loto6')
+
+
+def test_prune_keeps_recent_versions(tmp_path):
+    df = load('numbers3')
+    versions = []
+    for i, size in enumerate([200, 250, 300, 350, 400]):
+        predictor = MLPredictor('numbers3', cache_dir=tmp_path).fit(df.head(size))
+        versions.append(predictor.version)
+        # 作成順に古い更新時刻を付ける（最初のバージョンは読み込みで使ったことにする）
+        for path in predictor._paths(predictor.version):
+            os.utime(path, (1000 + i, 1000 + i))
+        if i == 2:
+            MLPredictor('numbers3', cache_dir=tmp_path)._load(versions[0])
+
+    assert cached_versions(tmp_path, 'numbers3') == {versions[0], versions[3], versions[4]}
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        os.path.basename(path) for version in [versions[0], versions[3], versions[4]]
+        for path in MLPredictor('numbers3', cache_dir=tmp_path)._paths(version)
+    )
+
+
+@pytest.mark.parametrize('lottery_type', ['loto6', 'loto7', 'numbers3', 'numbers4'])
+@pytest.mark.parametrize('rows', [1, 2, 10])
+def test_predict_ml_short_history(tmp_path, monkeypatch, lottery_type, rows):
+    analyzer = LotteryAnalyzer()
+    analyzer.load_frame(lottery_type, load(lottery_type, 'sample').head(rows))
+    monkeypatch.chdir(tmp_path)
+    prediction, explanation = getattr(analyzer, f'predict_{lottery_type}_ml')()
+
+    if lottery_type in LOTO_GAMES:
+        game = LOTO_GAMES[lottery_type]
+        numbers, bonus = prediction
+        bonus = [bonus] if isinstance(bonus, int) else bonus
+        assert len(set(numbers)) == game['picks']
+        assert len(bonus) == len(game['bonus_columns']) and not set(bonus) & set(numbers)
+        assert all(1 <= n <= game['number_range'] for n in list(numbers) + list(bonus))
+    else:
+        assert len(prediction) == int(lottery_type[-1]) and prediction.isdigit()
+    assert explanation
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Tests for the significance tests against scipy's reference implementations
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from lottery_analyzer import target_indices
+from lottery_stats import (benjamini_hochberg, binomial_p_values, frequency_significance,
+                           weekday_significance)
+
+
+def test_benjamini_hochberg_by_hand():
+    # 昇順 0.005, 0.01, 0.03, 0.04 -> ×4/1, ×4/2, ×4/3, ×4/4 = 0.02, 0.02, 0.04, 0.04
+    assert benjamini_hochberg([0.01, 0.04, 0.03, 0.005]) == pytest.approx([0.02, 0.04, 0.04, 0.02])
+    # 順位が上の補正値の方が小さい場合はそちらに揃える (0.08 -> 0.06)
+    assert benjamini_hochberg([0.02, 0.03, 0.5, 0.049]) == pytest.approx([0.06, 0.06, 0.5, 0.049 * 4 / 3])
+    adjusted = benjamini_hochberg([[0.6, 0.01], [0.7, 0.02]])
+    assert adjusted.shape == (2, 2)
+    assert adjusted == pytest.approx(np.array([[0.7, 0.04], [0.7, 0.04]]))
+    assert benjamini_hochberg([]).shape == (0,)
+
+
+def test_binomial_p_values_match_binomtest():
+    trials, probability = 30, 6 / 43
+    observed = np.arange(0, 16)
+    expected = [
+        min(1.0, 2 * min(stats.binomtest(k, trials, probability, alternative='less').pvalue,
+                         stats.binomtest(k, trials, probability, alternative='greater').pvalue))
+        for k in observed
+    ]
+    assert binomial_p_values(observed, trials, probability) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize('lottery_type', ['loto6', 'numbers3'])
+def test_frequency_significance_one_window(lottery_type):
+    df = pd.read_csv(f'data/{lottery_type}_large_sample.csv')
+    targets, size = target_indices(lottery_type, df)
+    window = 30
+    result = frequency_significance(targets, lottery_type, windows=[window])
+
+    counts = np.bincount(targets[-window:].ravel(), minlength=size)
+    assert result['counts'][0].tolist() == counts.tolist()
+    probability = result['expected'][0] / window
+    assert result['p_values'][0] == pytest.approx(binomial_p_values(counts, window, probability))
+    assert result['adjusted'][0] == pytest.approx(benjamini_hochberg(result['p_values'][0]))
+
+    # カイ二乗検定はロトは全数字で1組、ナンバーズは桁ごと
+    groups = [np.arange(size)] if lottery_type == 'loto6' else np.arange(size).reshape(-1, 10)
+    for g, members in enumerate(groups):
+        reference = stats.chisquare(counts[members], result['expected'][0][members])
+        assert result['chi2'][0, g] == pytest.approx(reference.statistic)
+        assert result['chi2_p'][0, g] == pytest.approx(reference.pvalue)
+
+
+def test_weekday_significance_matches_chisquare():
+    df = pd.read_csv('data/loto6_large_sample.csv', parse_dates=['date'])
+    targets, size = target_indices('loto6', df)
+    weekdays = df['date'].dt.dayofweek.to_numpy()
+    result = weekday_significance(targets, weekdays, 'loto6')
+
+    assert result['days'] == ['Monday', 'Thursday']
+    for row, day in enumerate([0, 3]):
+        counts = np.bincount(targets[weekdays == day].ravel(), minlength=size)
+        assert result['counts'][row].tolist() == counts.tolist()
+        reference = stats.chisquare(counts, result['expected'][row])
+        assert result['chi2'][row, 0] == pytest.approx(reference.statistic)
+        assert result['chi2_p'][row, 0] == pytest.approx(reference.pvalue)
+    assert result['chi2_adjusted'] == pytest.approx(benjamini_hochberg(result['chi2_p']))
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Tests for the covering (wheel) ticket generator
+"""
+
+import time
+from itertools import combinations
+
+import pytest
+
+from lottery_analyzer import LotteryAnalyzer
+from lottery_wheel import generate_wheel, schonheim_bound
+
+
+@pytest.mark.parametrize('pool_size,ticket_size,cover', [
+    (7, 3, 2), (8, 7, 2), (10, 6, 2), (12, 6, 3), (13, 7, 2), (9, 6, 1),
+])
+def test_every_subset_is_covered(pool_size, ticket_size, cover):
+    pool = list(range(3, 3 + 2 * pool_size, 2))
+    tickets = generate_wheel(pool, ticket_size, cover, time_budget=1.0, seed=0)
+
+    assert all(len(set(ticket)) == ticket_size and set(ticket) <= set(pool) for ticket in tickets)
+    covered = {subset for ticket in tickets for subset in combinations(sorted(ticket), cover)}
+    assert set(combinations(pool, cover)) <= covered
+    assert len(tickets) >= schonheim_bound(pool_size, ticket_size, cover)
+
+
+def test_trivial_pool_stops_early():
+    start = time.monotonic()
+    tickets = generate_wheel(range(1, 9), 7, 2, time_budget=10.0, seed=0)
+    assert time.monotonic() - start < 2.0
+    assert len(tickets) == schonheim_bound(8, 7, 2)
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        generate_wheel(range(1, 5), 6, 2)
+    with pytest.raises(ValueError):
+        generate_wheel(range(1, 10), 6, 7)
+
+
+def test_analyzer_pool_uses_frequency_settings():
+    analyzer = LotteryAnalyzer()
+    analyzer.load_data('loto6', 'data/loto6_large_sample.csv')
+    for recent_count, half_life in [(10, None), (100, None), (30, 5)]:
+        frequency = analyzer.analyze_frequency('loto6', 'loto6_', 43, recent_count, half_life)
+        top = sorted(sorted(frequency, key=lambda n: (-frequency[n], n))[:10])
+        pool, tickets = analyzer.generate_wheel('loto6', 10, 2, recent_count, half_life, time_budget=0.5)
+        assert pool == top
+        covered = {pair for ticket in tickets for pair in combinations(sorted(ticket), 2)}
+        assert set(combinations(pool, 2)) <= covered